@@ -0,0 +1,170 @@
+import collections
+import queue
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+# --- CONFIGURATION ---
+CALIBRATION_SECONDS = 1.0   # One-time ambient noise calibration when the stream opens
+ENERGY_RATIO = 2.5          # Speech starts when chunk energy exceeds noise floor * ratio
+MIN_ENERGY = 150            # Never let the threshold fall below this (int16 RMS)
+NOISE_ADAPT_RATE = 0.05     # How fast the noise floor follows silent chunks
+NOISE_WINDOW_SECONDS = 10   # Recent chunk energies the floor is re-estimated from
+NOISE_REESTIMATE_SECONDS = 2.0  # Re-estimate interval (also after every max-length cut)
+NOISE_PERCENTILE = 20       # Low percentile of recent energies taken as the ambient level
+PAUSE_SECONDS = 1.0         # Silence that ends an utterance (same as the old pause_threshold)
+PRE_ROLL_SECONDS = 0.3      # Audio kept from before speech onset
+MIN_SPEECH_SECONDS = 0.25   # Shorter bursts (clicks, coughs) are discarded
+MAX_UTTERANCE_SECONDS = 8   # Long utterances are cut here
+QUEUE_SIZE = 4              # Utterances waiting for recognition (oldest dropped when full)
+
+
+class MicrophoneStream:
+    """Keeps one microphone open and segments speech into utterances on a background thread.
+
+    The noise floor is calibrated once on open, follows silent chunks, and is
+    re-estimated every few seconds from a low percentile of all recent chunk
+    energies, so a lasting rise in ambient noise (which leaves no "silent"
+    chunks) is still learned. Listening never pauses for recalibration.
+    Complete utterances are queued as sr.AudioData.
+    """
+
+    def __init__(self, device_index=None, suppress=None):
+        self.device_index = device_index
+        self.suppress = suppress  # Callable: True while our own TTS is playing
+        self.utterances = queue.Queue(maxsize=QUEUE_SIZE)
+        self.noise_floor = MIN_ENERGY / ENERGY_RATIO
+        self.dropped = 0
+        self._running = False
+        self._thread = None
+        self._source = None
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._source = sr.Microphone(device_index=self.device_index)
+        self._source.__enter__()
+        self._calibrate()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="microphone", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._source:
+            self._source.__exit__(None, None, None)
+            self._source = None
+
+    def get(self, timeout=None):
+        """Returns the next utterance as sr.AudioData, or None on timeout."""
+        try:
+            return self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def clear(self):
+        while not self.utterances.empty():
+            self.utterances.get_nowait()
+
+    @property
+    def threshold(self):
+        return max(MIN_ENERGY, self.noise_floor * ENERGY_RATIO)
+
+    # --- AUDIO THREAD ---
+    def _chunk_seconds(self):
+        return self._source.CHUNK / self._source.SAMPLE_RATE
+
+    def _energy(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+    def _calibrate(self):
+        chunks = max(1, int(CALIBRATION_SECONDS / self._chunk_seconds()))
+        energies = [self._energy(self._source.stream.read(self._source.CHUNK)) for _ in range(chunks)]
+        self.noise_floor = sum(energies) / len(energies)
+
+    def _run(self):
+        chunk_seconds = self._chunk_seconds()
+        pre_roll = collections.deque(maxlen=max(1, int(PRE_ROLL_SECONDS / chunk_seconds)))
+        pause_chunks = int(PAUSE_SECONDS / chunk_seconds)
+        min_chunks = int(MIN_SPEECH_SECONDS / chunk_seconds)
+        max_chunks = int(MAX_UTTERANCE_SECONDS / chunk_seconds)
+        recent = collections.deque(maxlen=max(1, int(NOISE_WINDOW_SECONDS / chunk_seconds)))
+        reestimate_chunks = max(1, int(NOISE_REESTIMATE_SECONDS / chunk_seconds))
+        since_estimate = 0
+        frames = []
+        voiced = 0
+        silent = 0
+
+        while self._running:
+            try:
+                chunk = self._source.stream.read(self._source.CHUNK)
+            except Exception as e:
+                print(f"Microphone error: {e}")
+                break
+            if self.suppress and self.suppress():
+                # Ignore our own voice; drop any half-captured utterance
+                frames, voiced, silent = [], 0, 0
+                pre_roll.clear()
+                continue
+
+            energy = self._energy(chunk)
+            recent.append(energy)
+            since_estimate += 1
+            if since_estimate >= reestimate_chunks:
+                self._reestimate(recent)
+                since_estimate = 0
+            is_speech = energy > self.threshold
+            if not frames:
+                if is_speech:
+                    frames = list(pre_roll) + [chunk]
+                    voiced, silent = 1, 0
+                else:
+                    pre_roll.append(chunk)
+                    self.noise_floor += NOISE_ADAPT_RATE * (energy - self.noise_floor)
+                continue
+
+            frames.append(chunk)
+            if is_speech:
+                voiced += 1
+                silent = 0
+            else:
+                silent += 1
+            if silent >= pause_chunks or len(frames) >= max_chunks:
+                if voiced >= min_chunks:
+                    self._emit(b"".join(frames))
+                if silent < pause_chunks:
+                    self._reestimate(recent)  # Cut at max length: likely noise above the threshold
+                    since_estimate = 0
+                frames, voiced, silent = [], 0, 0
+                pre_roll.clear()
+
+    def _reestimate(self, energies):
+        self.noise_floor = float(np.percentile(energies, NOISE_PERCENTILE))
+
+    def _emit(self, data):
+        audio = sr.AudioData(data, self._source.SAMPLE_RATE, self._source.SAMPLE_WIDTH)
+        try:
+            self.utterances.put_nowait(audio)
+        except queue.Full:
+            self.utterances.get_nowait()
+            self.dropped += 1
+            self.utterances.put_nowait(audio)
+
+
+# --- SHARED STREAM ---
+_stream = None
+_stream_lock = threading.Lock()
+
+def get_stream(suppress=None):
+    """Returns the process-wide microphone stream, opening and calibrating it on first use."""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = MicrophoneStream(suppress=suppress).start()
+        return _stream
@@ -0,0 +1,190 @@
+"""Headless benchmark for the focus detector.
+
+Feeds the vision engine from video files or synthetic frames (no camera, no
+window) and reports FPS, per-stage latency percentiles and focus-transition
+counts for every detector configuration, as JSON. Detection goes through
+the same path as the app: VisionEngine.detect (tracker plus, when
+adaptive, the DetectionScheduler) and the debounced FocusStateMachine.
+
+    python benchmark.py --video session.mp4 --detectors haar lbp --out bench.json
+    python benchmark.py --synthetic 600 --detect-widths 0 480 320
+"""
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from focus_state import FocusStateMachine, DetectionScheduler
+from vision_engine import VisionEngine, ADAPTIVE_DETECTION, FOCUSED_COLOR, UNFOCUSED_COLOR
+
+STAGES = ("convert", "detect", "render")
+
+
+# --- FRAME SOURCES ---
+class SyntheticSource:
+    """Generates noisy frames with a bright oval that wanders and periodically disappears."""
+
+    def __init__(self, frames=300, size=(1280, 720), away_every=90, seed=0):
+        self.frames = frames
+        self.size = size
+        self.away_every = away_every
+        self.rng = np.random.default_rng(seed)
+        self.index = 0
+
+    def read(self):
+        if self.index >= self.frames:
+            return False, None
+        w, h = self.size
+        frame = self.rng.integers(0, 60, (h, w, 3), dtype=np.uint8)
+        present = (self.index // self.away_every) % 2 == 0
+        if present:
+            cx = int(w / 2 + w / 6 * np.sin(self.index / 20))
+            cy = h // 2
+            cv2.ellipse(frame, (cx, cy), (w // 10, h // 6), 0, 0, 360, (190, 200, 220), -1)
+            cv2.circle(frame, (cx - w // 30, cy - h // 20), w // 80, (30, 30, 30), -1)
+            cv2.circle(frame, (cx + w // 30, cy - h // 20), w // 80, (30, 30, 30), -1)
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def open_source(spec, synthetic_frames):
+    if spec is None:
+        return SyntheticSource(frames=synthetic_frames)
+    capture = cv2.VideoCapture(spec)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video: {spec}")
+    return capture
+
+
+# --- STATS ---
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples):
+    values = sorted(samples)
+    return {
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+# --- RUN ---
+def run_config(source, detector, detect_width, every_n, render=True, adaptive=ADAPTIVE_DETECTION):
+    """Runs one configuration over the whole source; returns its result dict."""
+    engine = VisionEngine("benchmark", detector=detector, source=source)
+    engine.detector.detect_width = detect_width
+    engine.tracker.detect_every_n = every_n
+    engine.focus = FocusStateMachine()
+    adaptive = adaptive and every_n > 1  # As in the app: no scheduling without tracking
+    if adaptive:
+        engine.scheduler = DetectionScheduler(engine.focus, engine.tracker, base=every_n)
+    timings = {stage: [] for stage in STAGES}
+    frames = 0
+    skipped = 0
+    transitions = 0
+    state = None
+
+    start = time.perf_counter()
+    while True:
+        success, frame = source.read()
+        if not success:
+            break
+        faces = engine.detect(frame)
+        focused = engine.focus.update(len(faces) > 0)
+        rendering = time.perf_counter()
+        if render:
+            label, color = ("FOCUSED", FOCUSED_COLOR) if focused else ("UNFOCUSED", UNFOCUSED_COLOR)
+            engine.draw_overlay(frame, faces, label, color)
+        rendered = time.perf_counter()
+
+        if engine.last_detect_seconds is None:
+            skipped += 1  # Scheduler skip: no detector time to record
+        else:
+            convert, detect = engine.last_detect_seconds
+            timings["convert"].append(convert)
+            timings["detect"].append(detect)
+        timings["render"].append(rendered - rendering)
+        if engine.focus.focused is not None:
+            if state is not None and engine.focus.focused != state:
+                transitions += 1
+            state = engine.focus.focused
+        frames += 1
+    elapsed = time.perf_counter() - start
+    source.release()
+
+    return {
+        "detector": detector,
+        "detect_width": detect_width,
+        "detect_every_n": every_n,
+        "adaptive": adaptive,
+        "frames": frames,
+        "fps": round(frames / elapsed, 2) if elapsed else 0.0,
+        "stages": {stage: summarize(values) for stage, values in timings.items()},
+        "skipped_frames": skipped,
+        "skip_rate": round(skipped / frames, 3) if frames else 0.0,
+        "focus_transitions": transitions,
+        "tracker": engine.tracker.stats(),
+        "scheduler": engine.scheduler.stats() if engine.scheduler else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless focus detector benchmark.")
+    parser.add_argument("--video", nargs="*", default=[], help="Recorded video files to replay")
+    parser.add_argument("--synthetic", type=int, default=300, help="Synthetic frames when no video is given")
+    parser.add_argument("--detectors", nargs="+", default=["haar"], help="haar / lbp / dnn")
+    parser.add_argument("--detect-widths", nargs="+", type=int, default=[480], help="0 = full resolution")
+    parser.add_argument("--every-n", nargs="+", type=int, default=[1, 5], help="Detector cadence (1 = no tracking)")
+    parser.add_argument("--no-render", action="store_true", help="Skip the overlay stage")
+    parser.add_argument("--fixed-rate", action="store_true",
+                        help="Keep detect_every_n fixed instead of the adaptive scheduler")
+    parser.add_argument("--out", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    sources = args.video or [None]
+    results = []
+    for spec, detector, width, every_n in itertools.product(sources, args.detectors, args.detect_widths, args.every_n):
+        try:
+            result = run_config(open_source(spec, args.synthetic), detector, width, every_n, not args.no_render,
+                                not args.fixed_rate and ADAPTIVE_DETECTION)
+        except (IOError, ValueError) as e:
+            print(f"Skipping {detector} on {spec or 'synthetic'}: {e}", file=sys.stderr)
+            continue
+        result["source"] = spec or f"synthetic:{args.synthetic}"
+        results.append(result)
+        print(f"{result['source']} {detector} width={width} n={every_n} adaptive={result['adaptive']}: "
+              f"{result['fps']} fps", file=sys.stderr)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "opencv": cv2.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
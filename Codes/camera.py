@@ -0,0 +1,132 @@
+import atexit
+import threading
+import time
+
+import cv2
+
+# --- CONFIGURATION ---
+CAMERA_WIDTH = 1280
+CAMERA_HEIGHT = 720
+CAMERA_FPS = 30
+CAMERA_FOURCC = "MJPG"   # MJPG keeps 720p/1080p within USB 2.0 bandwidth; "YUYV" for uncompressed
+KEEP_WARM_SECONDS = 30   # Idle cameras stay open this long so the next mode starts instantly
+
+
+def _fourcc_to_str(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00") or "?"
+
+
+class SharedCamera:
+    """A VideoCapture handed out by the CameraManager; release() returns it to the manager."""
+
+    def __init__(self, manager, index, capture):
+        self.manager = manager
+        self.index = index
+        self.capture = capture
+        self.users = 0
+        self.idle_since = None
+        self._read_lock = threading.Lock()
+        self.negotiated = {
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": capture.get(cv2.CAP_PROP_FPS),
+            "fourcc": _fourcc_to_str(capture.get(cv2.CAP_PROP_FOURCC)),
+        }
+
+    def read(self, image=None):
+        with self._read_lock:
+            return self.capture.read(image) if image is not None else self.capture.read()
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.manager.release(self)
+
+
+class CameraManager:
+    """Opens each device once with the requested format and shares the warm stream between modes."""
+
+    def __init__(self, keep_warm=KEEP_WARM_SECONDS):
+        self.keep_warm = keep_warm
+        self._cameras = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def acquire(self, index=0, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS, fourcc=CAMERA_FOURCC):
+        """Returns the shared camera for a device, opening it on first use."""
+        with self._lock:
+            camera = self._cameras.get(index)
+            if camera is None:
+                camera = self._open(index, width, height, fps, fourcc)
+                if camera is None:
+                    return None
+                self._cameras[index] = camera
+            camera.users += 1
+            camera.idle_since = None
+            return camera
+
+    def _open(self, index, width, height, fps, fourcc):
+        started = time.perf_counter()
+        capture = cv2.VideoCapture(index)
+        if not capture.isOpened():
+            print(f"Camera {index} could not be opened.")
+            return None
+        # FOURCC first: many drivers only accept high resolutions in MJPG
+        if fourcc:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        capture.set(cv2.CAP_PROP_FPS, fps)
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        camera = SharedCamera(self, index, capture)
+        n = camera.negotiated
+        print(f"Camera {index} opened in {(time.perf_counter() - started) * 1000:.0f} ms: "
+              f"{n['width']}x{n['height']} @ {n['fps']:.0f} fps {n['fourcc']} "
+              f"(requested {width}x{height} @ {fps} fps {fourcc})")
+        return camera
+
+    def release(self, camera):
+        """Drops one user; the device closes after KEEP_WARM_SECONDS without users."""
+        with self._lock:
+            camera.users = max(0, camera.users - 1)
+            if camera.users:
+                return
+            if not self.keep_warm:
+                self._close(camera)
+                return
+            camera.idle_since = time.monotonic()
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="camera-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(1)
+            with self._lock:
+                now = time.monotonic()
+                for camera in list(self._cameras.values()):
+                    if camera.idle_since is not None and now - camera.idle_since >= self.keep_warm:
+                        self._close(camera)
+                if not self._cameras:
+                    self._reaper = None
+                    return
+
+    def _close(self, camera):
+        camera.capture.release()
+        self._cameras.pop(camera.index, None)
+
+    def shutdown(self):
+        """Releases every device immediately (called at exit)."""
+        with self._lock:
+            for camera in list(self._cameras.values()):
+                self._close(camera)
+
+
+# --- SHARED MANAGER ---
+manager = CameraManager()
+atexit.register(manager.shutdown)
+
+def acquire(index=0, **kwargs):
+    return manager.acquire(index, **kwargs)
@@ -0,0 +1,298 @@
+"""Local text command channel for the voice assistant's intents (no microphone needed).
+
+    python command_server.py serve [--speak] [--rate 5]
+    python command_server.py serve --classify-only --rate 100000   # measure the channel itself
+    python command_server.py bench --clients 50 --total 2000 "what time is it"
+
+Two protocols share one port (default 127.0.0.1:8766, VISION_COMMAND_PORT):
+    line:  nc 127.0.0.1 8766, then one command per line -> "OK <reply>" or "ERR <reason>"
+    HTTP:  curl -d "tell me a joke" http://127.0.0.1:8766/command
+           curl "http://127.0.0.1:8766/command?q=what+time+is+it&speak=1"
+
+Commands are classified by intents.py and answered by voice_assistant's
+intent handlers on a thread pool. Each client address has its own
+token-bucket limit, shared by all of its connections and both protocols
+(a reconnect or a client-chosen header never resets it).
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import intents
+import metrics
+
+# --- CONFIGURATION ---
+COMMAND_HOST = "127.0.0.1"
+COMMAND_PORT = int(os.environ.get("VISION_COMMAND_PORT", "8766"))
+COMMAND_RATE = float(os.environ.get("VISION_COMMAND_RATE", "5"))  # Commands per second per client address
+COMMAND_BURST = 10        # Commands a client may send at once before the rate applies
+COMMAND_WORKERS = 8       # Intent handlers running at once
+COMMAND_TIMEOUT = 12.0    # Seconds before a command gets a timeout error
+MAX_COMMAND_BYTES = 1024
+MAX_BUCKETS = 4096        # Idle clients are forgotten beyond this
+# Session-level intents that only make sense in the microphone loop
+CONTROL_INTENTS = {"exit", "cancel", "switch_to_vision"}
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst):
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, rate, burst):
+        now = time.monotonic()
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CommandServer:
+    """asyncio server that routes text commands through the assistant's intent dispatch.
+
+    Everything on the event loop is cheap (parsing, classification, rate
+    limiting); handlers, which may call the network or open a browser, run
+    on a thread pool and are awaited with a timeout.
+    """
+
+    def __init__(self, host=COMMAND_HOST, port=COMMAND_PORT, rate=COMMAND_RATE, burst=COMMAND_BURST,
+                 workers=COMMAND_WORKERS, timeout=COMMAND_TIMEOUT, speak=False, classify_only=False):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.speak = speak
+        self.classify_only = classify_only
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="command")
+        self._buckets = {}
+        self._execute = None
+        self.served = 0
+        self.limited = 0
+        self.timed_out = 0
+
+    def _handler(self):
+        if self._execute is None:
+            import voice_assistant  # Heavy imports (pyjokes, requests, speech_recognition...)
+            self._execute = voice_assistant.execute
+        return self._execute
+
+    def _run_handler(self, match, query):
+        """Pool side of a command, so even a first-use import never blocks the event loop."""
+        return self._handler()(match, query)
+
+    # --- DISPATCH ---
+    def allow(self, client):
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._forget_idle()
+            bucket = self._buckets[client] = TokenBucket(self.burst)
+        return bucket.take(self.rate, self.burst)
+
+    def _forget_idle(self):
+        now = time.monotonic()
+        idle = [c for c, b in self._buckets.items() if b.tokens + (now - b.updated) * self.rate >= self.burst]
+        for client in idle:
+            del self._buckets[client]
+
+    async def run_command(self, text, client, speak=None):
+        """Returns (status, intent, reply text); status is ok, limited, unsupported, timeout or error."""
+        if not self.allow(client):
+            self.limited += 1
+            return "limited", None, "Rate limit exceeded, slow down."
+        started = time.perf_counter()
+        match = intents.classify(text.lower())
+        if match.intent in CONTROL_INTENTS:
+            return "unsupported", match.intent, f"'{match.intent}' is only available by voice."
+        if self.classify_only:
+            status, reply = "ok", match.intent
+        else:
+            status, reply = await self._execute_in_pool(match, text.lower(), speak)
+        metrics.observe("command", time.perf_counter() - started)
+        self.served += 1
+        return status, match.intent, reply
+
+    async def _execute_in_pool(self, match, query, speak):
+        if match.intent == "play_youtube" and not match.slots.get("song"):
+            return "ok", "What should I play?"
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, self._run_handler, match, query)
+        try:
+            reply = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return "timeout", "Sorry, that is taking too long."
+        except Exception as e:
+            print(f"Command '{query}' failed: {e}")
+            return "error", "Sorry, something went wrong with that request."
+        if reply is None:
+            return "ok", ""
+        text, cache = (reply.text, reply.cache) if hasattr(reply, "text") else (str(reply), False)
+        if self.speak if speak is None else speak:
+            import speech
+            speech.speak(text, priority=speech.PRIORITY_HIGH, block=False, cache=cache)
+        return "ok", text
+
+    # --- PROTOCOLS ---
+    async def _handle_client(self, reader, writer):
+        peer = writer.get_extra_info("peername") or ("?", 0)
+        try:
+            first = await reader.readline()
+            if first.split(b" ", 1)[0] in (b"GET", b"POST"):
+                await self._serve_http(first, reader, writer, peer)
+            else:
+                await self._serve_lines(first, reader, writer, peer)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_lines(self, line, reader, writer, peer):
+        client = peer[0]  # Rate-limited per address, not per connection
+        while line:
+            text = line.decode("utf-8", "replace").strip()[:MAX_COMMAND_BYTES]
+            if text:
+                status, _, reply = await self.run_command(text, client)
+                prefix = "OK" if status == "ok" else "ERR"
+                writer.write(f"{prefix} {' '.join(reply.split())}\n".encode())
+                await writer.drain()
+            line = await reader.readline()
+
+    async def _serve_http(self, request_line, reader, writer, peer):
+        while request_line:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", "0"))
+            if length > MAX_COMMAND_BYTES:
+                await self._respond(writer, 400, "Command too long", keep_alive=False)
+                return
+            body = (await reader.readexactly(length)).decode("utf-8", "replace") if length else ""
+            url = urlsplit(target)
+            params = parse_qs(url.query)
+            keep_alive = headers.get("connection", "").lower() != "close"
+            if url.path != "/command":
+                await self._respond(writer, 404, "Not found", keep_alive)
+            else:
+                text = (params.get("q", [""])[0] or body).strip()[:MAX_COMMAND_BYTES]
+                if not text:
+                    await self._respond(writer, 400, "Send a command as ?q= or the request body", keep_alive)
+                else:
+                    speak = params["speak"][0] == "1" if "speak" in params else None
+                    status, intent, reply = await self.run_command(text, peer[0], speak)
+                    code = {"ok": 200, "limited": 429, "unsupported": 400, "timeout": 504}.get(status, 500)
+                    await self._respond(writer, code, reply, keep_alive, intent)
+            if not keep_alive:
+                return
+            request_line = await reader.readline()
+
+    async def _respond(self, writer, code, text, keep_alive, intent=None):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+                  500: "Internal Server Error", 504: "Gateway Timeout"}[code]
+        body = text.encode("utf-8")
+        head = [f"HTTP/1.1 {code} {reason}", "Content-Type: text/plain; charset=utf-8",
+                f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if intent:
+            head.append(f"X-Intent: {intent}")
+        if code == 429:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self):
+        if not self.classify_only:
+            print("Loading the assistant's intent handlers...")
+            self._handler()  # Before accepting clients, not during the first command
+        server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=MAX_COMMAND_BYTES * 4)
+        print(f"Command server on {self.host}:{self.port} ({self.rate:g}/s per client address, burst {self.burst})")
+        async with server:
+            await server.serve_forever()
+
+    def stats(self):
+        return {"served": self.served, "limited": self.limited, "timed_out": self.timed_out,
+                "clients": len(self._buckets)}
+
+
+# --- LOAD GENERATOR ---
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+async def _bench_client(host, port, commands, latencies, outcomes):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for text in commands:
+            started = time.perf_counter()
+            writer.write(text.encode() + b"\n")
+            await writer.drain()
+            reply = await reader.readline()
+            latencies.append(time.perf_counter() - started)
+            if reply.startswith(b"OK"):
+                outcomes["ok"] += 1
+            else:
+                outcomes["limited" if b"Rate limit" in reply else "errors"] += 1
+    finally:
+        writer.close()
+
+async def run_bench(host, port, clients, total, commands):
+    """Sends `total` commands over `clients` concurrent line connections; returns the report."""
+    per_client = [[commands[i % len(commands)] for i in range(c, total, clients)] for c in range(clients)]
+    latencies = []
+    outcomes = {"ok": 0, "limited": 0, "errors": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(_bench_client(host, port, cmds, latencies, outcomes) for cmds in per_client))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ms = lambda q: round(percentile(latencies, q) * 1000, 2) if latencies else None
+    return {"clients": clients, "commands": len(latencies), **outcomes,
+            "seconds": round(elapsed, 2), "commands_per_s": round(len(latencies) / elapsed, 1),
+            "p50_ms": ms(0.50), "p95_ms": ms(0.95), "p99_ms": ms(0.99)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local text command server for the assistant.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="Accept commands from local clients")
+    serve_cmd.add_argument("--port", type=int, default=COMMAND_PORT)
+    serve_cmd.add_argument("--rate", type=float, default=COMMAND_RATE, help="Commands per second per client address")
+    serve_cmd.add_argument("--speak", action="store_true", help="Also speak every reply")
+    serve_cmd.add_argument("--classify-only", action="store_true",
+                           help="Reply with the intent name instead of running it (for load tests)")
+    bench_cmd = sub.add_parser("bench", help="Load-test a running server (all bench clients share one "
+                                              "address, so start it with a high --rate)")
+    bench_cmd.add_argument("commands", nargs="*", default=["what time is it", "tell me a fun fact"])
+    bench_cmd.add_argument("--port", type=int, default=COMMAND_PORT)
+    bench_cmd.add_argument("--clients", type=int, default=20)
+    bench_cmd.add_argument("--total", type=int, default=1000, help="Commands across all clients")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = CommandServer(port=args.port, rate=args.rate, speak=args.speak, classify_only=args.classify_only)
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            print(f"Command server stopped: {server.stats()}")
+    else:
+        report = asyncio.run(run_bench(COMMAND_HOST, args.port, args.clients, args.total, args.commands))
+        print(f"{report['commands']} commands from {report['clients']} clients in {report['seconds']} s: "
+              f"{report['commands_per_s']} commands/s "
+              f"({report['limited']} rate limited, {report['errors']} errors)")
+        print(f"latency p50 {report['p50_ms']} ms  p95 {report['p95_ms']} ms  p99 {report['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
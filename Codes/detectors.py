@@ -0,0 +1,165 @@
+import os
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+DETECT_WIDTH = 480         # Width of the image the detector sees (0 = full camera resolution)
+EQUALIZE_HIST = True       # Histogram-equalize the downscaled copy (helps in dim rooms)
+MIN_FACE_FRACTION = 0.12   # Smallest expected face, as a fraction of the frame width
+MAX_FACE_FRACTION = 0.8    # Largest expected face, as a fraction of the frame width
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+HAAR_CASCADE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+LBP_CASCADE = os.path.join(MODELS_DIR, "lbpcascade_frontalface_improved.xml")
+DNN_CONFIG = os.path.join(MODELS_DIR, "deploy.prototxt")
+DNN_MODEL = os.path.join(MODELS_DIR, "res10_300x300_ssd_iter_140000.caffemodel")
+DNN_CONFIDENCE = 0.5
+
+
+class FaceDetector:
+    """Detector interface used by the vision engine and the tracker.
+
+    `prepare()` turns a BGR frame into the detector's input image once per
+    frame; `detect()` may then be called on it or on any crop of it (e.g. a
+    tracker ROI). Boxes come back in detection-image coordinates and
+    `to_frame()` maps them to the frame.
+    """
+    name = "base"
+
+    def __init__(self, detect_width=DETECT_WIDTH, min_face=MIN_FACE_FRACTION, max_face=MAX_FACE_FRACTION):
+        self.detect_width = detect_width
+        self.min_face = min_face
+        self.max_face = max_face
+        self.min_size = (0, 0)
+        self.max_size = (0, 0)
+        self._buffers = {}
+
+    def _buffer(self, name, shape):
+        """Returns a reusable array for per-frame intermediates (prepare() runs on one thread)."""
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._buffers[name] = np.empty(shape, np.uint8)
+        return buf
+
+    def _downscale(self, image):
+        height, width = image.shape[:2]
+        scale = 1.0
+        if self.detect_width and width > self.detect_width:
+            scale = self.detect_width / width
+            size = (self.detect_width, max(1, int(round(height * scale))))
+            small = self._buffer("small", (size[1], size[0]) + image.shape[2:])
+            image = cv2.resize(image, size, dst=small, interpolation=cv2.INTER_AREA)
+        # Face size bounds let the detector skip scales it can never match
+        min_side = int(image.shape[1] * self.min_face)
+        max_side = int(image.shape[1] * self.max_face)
+        self.min_size = (min_side, min_side)
+        self.max_size = (max_side, max_side)
+        return image, scale
+
+    def prepare(self, frame):
+        """Returns (detection image, scale) for a full-resolution BGR frame."""
+        raise NotImplementedError
+
+    def detect(self, image):
+        raise NotImplementedError
+
+    @staticmethod
+    def to_frame(boxes, scale):
+        """Maps boxes from detection-image coordinates back to frame coordinates."""
+        if scale == 1.0:
+            return boxes
+        return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+
+# --- CASCADE BACKENDS ---
+class CascadeDetector(FaceDetector):
+    """OpenCV cascade classifier run on a downscaled grayscale copy of the frame."""
+    name = "cascade"
+
+    def __init__(self, cascade_path, equalize=EQUALIZE_HIST, scale_factor=1.5, min_neighbors=5, **kwargs):
+        super().__init__(**kwargs)
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise IOError(f"Could not load cascade: {cascade_path}")
+        self.equalize = equalize
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def prepare(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._buffer("gray", frame.shape[:2]))
+        gray, scale = self._downscale(gray)
+        if self.equalize:
+            gray = cv2.equalizeHist(gray, dst=gray)
+        return gray, scale
+
+    def detect(self, image):
+        return self.cascade.detectMultiScale(image, scaleFactor=self.scale_factor,
+                                             minNeighbors=self.min_neighbors,
+                                             minSize=self.min_size, maxSize=self.max_size)
+
+
+class HaarDetector(CascadeDetector):
+    """Haar frontal-face cascade (bundled with OpenCV)."""
+    name = "haar"
+
+    def __init__(self, cascade_path=HAAR_CASCADE, **kwargs):
+        super().__init__(cascade_path, **kwargs)
+
+
+class LbpDetector(CascadeDetector):
+    """LBP frontal-face cascade: faster than Haar, slightly less accurate."""
+    name = "lbp"
+
+    def __init__(self, cascade_path=LBP_CASCADE, scale_factor=1.2, min_neighbors=4, **kwargs):
+        super().__init__(cascade_path, scale_factor=scale_factor, min_neighbors=min_neighbors, **kwargs)
+
+
+# --- DNN BACKEND ---
+class DnnDetector(FaceDetector):
+    """Res10 SSD face detector through cv2.dnn, loaded from local model files."""
+    name = "dnn"
+
+    def __init__(self, config_path=DNN_CONFIG, model_path=DNN_MODEL, confidence=DNN_CONFIDENCE,
+                 input_size=(300, 300), **kwargs):
+        super().__init__(**kwargs)
+        if not (os.path.exists(config_path) and os.path.exists(model_path)):
+            raise IOError(f"DNN model files not found: {config_path}, {model_path}")
+        self.net = cv2.dnn.readNetFromCaffe(config_path, model_path)
+        self.confidence = confidence
+        self.input_size = input_size
+
+    def prepare(self, frame):
+        return self._downscale(frame)
+
+    def detect(self, image):
+        h, w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, self.input_size, (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        faces = []
+        for det in detections:
+            if det[2] < self.confidence:
+                continue
+            x0, y0 = int(det[3] * w), int(det[4] * h)
+            x1, y1 = int(det[5] * w), int(det[6] * h)
+            x0, y0 = max(0, x0), max(0, y0)
+            side = max(x1 - x0, y1 - y0)
+            if x1 <= x0 or y1 <= y0 or side < self.min_size[0] or side > self.max_size[0]:
+                continue
+            faces.append((x0, y0, min(w, x1) - x0, min(h, y1) - y0))
+        return faces
+
+
+# --- REGISTRY ---
+DETECTORS = {
+    "haar": HaarDetector,
+    "lbp": LbpDetector,
+    "dnn": DnnDetector,
+}
+
+def make_detector(name="haar", **kwargs):
+    """Builds a detector by name ('haar', 'lbp' or 'dnn')."""
+    try:
+        return DETECTORS[name.lower()](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown detector '{name}'. Choose from: {', '.join(DETECTORS)}")
@@ -0,0 +1,142 @@
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+import speech
+
+# --- CONFIGURATION ---
+DISPATCH_WORKERS = 4     # Intent handlers that may run at once
+HANDLER_TIMEOUT = 12.0   # Seconds before a handler's reply is given up on
+TIMEOUT_REPLY = "Sorry, that is taking too long."
+ERROR_REPLY = "Sorry, something went wrong with that request."
+
+# A handler's answer; cache=True lets fixed phrases play from the phrase cache
+Reply = namedtuple("Reply", ["text", "cache"])
+Reply.__new__.__defaults__ = (False,)
+
+
+class Job:
+    """One dispatched command, answered in the order it was heard."""
+    __slots__ = ("seq", "intent", "future", "deadline", "cancelled")
+
+    def __init__(self, seq, intent, timeout):
+        self.seq = seq
+        self.intent = intent
+        self.future = None
+        self.deadline = time.monotonic() + timeout
+        self.cancelled = False
+
+
+class Dispatcher:
+    """Runs intent handlers on a thread pool while the listener keeps taking commands.
+
+    Handlers return a Reply, a plain string or None. A responder thread
+    speaks the replies strictly in submission order, so a fast answer never
+    overtakes a slow one that was asked first. cancel() drops everything in
+    flight and cuts off speech.
+    """
+
+    def __init__(self, workers=DISPATCH_WORKERS, timeout=HANDLER_TIMEOUT, say=None, on_done=None):
+        self.timeout = timeout
+        self.say = say or self._say
+        self.on_done = on_done  # Called as on_done(intent, seconds) when a handler returns or fails
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="intent")
+        self._jobs = deque()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.timed_out = 0
+        self.cancelled = 0
+        self._responder = threading.Thread(target=self._respond_loop, name="intent-responder", daemon=True)
+        self._responder.start()
+
+    @staticmethod
+    def _say(reply):
+        speech.speak(reply.text, priority=speech.PRIORITY_HIGH, cache=reply.cache)
+
+    def submit(self, intent, handler, *args):
+        """Starts a handler now; its reply is spoken after every earlier command's reply."""
+        job = Job(next(self._seq), intent, self.timeout)
+        with self._cond:
+            job.future = self._pool.submit(self._run, job, handler, args)
+            self._jobs.append(job)
+            self._cond.notify_all()
+        return job
+
+    def _run(self, job, handler, args):
+        if job.cancelled:
+            return None
+        started = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            seconds = time.perf_counter() - started
+            metrics.observe("intent_dispatch", seconds)
+            if self.on_done:
+                self.on_done(job.intent, seconds)
+
+    def _respond_loop(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs[0]
+            # Short waits so cancel() never leaves the responder stuck on a dropped job
+            while not job.cancelled and not job.future.done() and time.monotonic() < job.deadline:
+                wait([job.future], timeout=min(0.1, max(0.0, job.deadline - time.monotonic())))
+            reply = None
+            if not job.cancelled:
+                if not job.future.done():
+                    job.cancelled = True  # A late result is dropped
+                    self.timed_out += 1
+                    reply = Reply(TIMEOUT_REPLY, True)
+                else:
+                    try:
+                        reply = job.future.result()
+                    except Exception as e:
+                        print(f"Intent '{job.intent}' failed: {e}")
+                        reply = Reply(ERROR_REPLY, True)
+            with self._cond:
+                current = bool(self._jobs) and self._jobs[0] is job  # False once cancel() cleared it
+                if current:
+                    self._jobs.popleft()
+                self._cond.notify_all()
+            if current and reply is not None:
+                self.say(reply if isinstance(reply, Reply) else Reply(str(reply)))
+
+    def cancel(self):
+        """Drops every pending reply (results of running handlers are discarded) and stops speech."""
+        with self._cond:
+            for job in self._jobs:
+                job.cancelled = True
+                job.future.cancel()
+                self.cancelled += 1
+            self._jobs.clear()
+            self._cond.notify_all()
+        speech.get_worker().cancel()
+
+    def busy(self):
+        """True while replies are pending or being spoken."""
+        return bool(self._jobs) or speech.is_speaking()
+
+    def wait_idle(self, timeout=None):
+        """Blocks until every submitted command has been answered."""
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while self._jobs:
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._pool.shutdown(wait=False)
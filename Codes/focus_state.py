@@ -0,0 +1,131 @@
+import math
+import os
+import time
+
+from tracking import DETECT_EVERY_N
+
+# --- CONFIGURATION ---
+FOCUS_WINDOW = 9          # Recent detection results each decision is based on
+FOCUS_ON_RATIO = 0.6      # Share of the window with a face needed to become FOCUSED
+FOCUS_OFF_RATIO = 0.2     # Share at or below which the state becomes UNFOCUSED
+MIN_DETECT_EVERY_N = 2    # Detection interval around transitions (1 would disable tracking)
+MAX_DETECT_EVERY_N = 15   # Longest interval once the state has been stable for a while
+STABLE_SECONDS = 5.0      # Each further this-many seconds in one state stretches the interval by one frame
+TRANSITION_HOLD = 1.5     # Seconds after a transition that stay at the fastest rate
+DETECT_BUDGET_MS = float(os.environ.get("VISION_DETECT_BUDGET_MS", "12"))  # Mean detection time per frame
+COST_SMOOTHING = 0.1      # EWMA weight of the newest frame-time sample
+
+
+class FocusStateMachine:
+    """Debounced FOCUSED / UNFOCUSED decision with hysteresis over the last N detections.
+
+    The state turns FOCUSED once at least FOCUS_ON_RATIO of the window saw a
+    face and UNFOCUSED once at most FOCUS_OFF_RATIO did; anything in between
+    keeps the current state, so single-frame misses never flip it.
+    """
+
+    def __init__(self, window=FOCUS_WINDOW, on_ratio=FOCUS_ON_RATIO, off_ratio=FOCUS_OFF_RATIO):
+        self.window = window
+        self.on_count = max(1, math.ceil(on_ratio * window))
+        self.off_count = int(off_ratio * window)
+        self._ring = bytearray(window)
+        self._index = 0
+        self._filled = 0
+        self.hits = 0
+        self.focused = None  # Undecided until the window has filled once
+        self.changed_at = time.monotonic()
+        self.transitions = 0
+
+    def update(self, face_detected):
+        """Adds one detection result; returns the debounced state (False while undecided)."""
+        hit = 1 if face_detected else 0
+        self.hits += hit - self._ring[self._index]
+        self._ring[self._index] = hit
+        self._index = (self._index + 1) % self.window
+        if self._filled < self.window:
+            self._filled += 1
+            if self._filled < self.window and self.hits < self.on_count:
+                return False
+        if self.focused is not True and self.hits >= self.on_count:
+            self._change(True)
+        elif self.focused is not False and self.hits <= self.off_count:
+            self._change(False)
+        return bool(self.focused)
+
+    def _change(self, focused):
+        self.focused = focused
+        self.changed_at = time.monotonic()
+        self.transitions += 1
+
+    @property
+    def uncertain(self):
+        """True while the window is between the two thresholds (a transition may be coming)."""
+        return self.off_count < self.hits < self.on_count
+
+    def stable_for(self):
+        return time.monotonic() - self.changed_at
+
+
+class DetectionScheduler:
+    """Chooses how many frames pass between detector runs from focus stability and a time budget.
+
+    Runs on the detection thread. While a face is tracked the interval is
+    applied as the tracker's detect_every_n; with nothing to track, due()
+    skips frames between full-frame scans instead.
+    """
+
+    def __init__(self, focus, tracker, base=DETECT_EVERY_N, min_n=MIN_DETECT_EVERY_N, max_n=MAX_DETECT_EVERY_N,
+                 stable_seconds=STABLE_SECONDS, hold=TRANSITION_HOLD, budget_ms=DETECT_BUDGET_MS):
+        self.focus = focus
+        self.tracker = tracker
+        self.base = base
+        self.min_n = min_n
+        self.max_n = max_n
+        self.stable_seconds = stable_seconds
+        self.hold = hold
+        self.budget = budget_ms / 1000
+        self.every_n = base
+        self.detect_cost = None  # EWMA seconds of a frame that ran the detector
+        self.track_cost = 0.0    # EWMA seconds of a tracked or skipped frame
+        self.skipped = 0
+        self._since_detect = 0
+
+    def due(self):
+        """With no face to track: True when this frame should get a full-frame scan."""
+        self._since_detect += 1
+        if self._since_detect >= self.every_n:
+            self._since_detect = 0
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, seconds, ran_detector):
+        """Records one frame's detection-thread time and updates the interval."""
+        if ran_detector:
+            self._since_detect = 0
+            if self.detect_cost is None:
+                self.detect_cost = seconds
+            else:
+                self.detect_cost += COST_SMOOTHING * (seconds - self.detect_cost)
+        else:
+            self.track_cost += COST_SMOOTHING * (seconds - self.track_cost)
+        self.every_n = self._choose()
+        self.tracker.detect_every_n = self.every_n
+
+    def _choose(self):
+        focus = self.focus
+        stable_for = focus.stable_for()
+        if focus.focused is None or focus.uncertain or stable_for < self.hold:
+            n = self.min_n
+        else:
+            n = self.base + int(stable_for // self.stable_seconds)
+        # Mean cost per frame is (D + (n - 1) * T) / n; pick n so it stays within the budget
+        d, t = self.detect_cost, self.track_cost
+        if d is not None and d > self.budget:
+            n = max(n, self.max_n if self.budget <= t else math.ceil((d - t) / (self.budget - t)))
+        return max(self.min_n, min(self.max_n, n))
+
+    def stats(self):
+        return {"every_n": self.every_n, "skipped_frames": self.skipped,
+                "detect_ms": round(self.detect_cost * 1000, 2) if self.detect_cost is not None else None,
+                "track_ms": round(self.track_cost * 1000, 2)}
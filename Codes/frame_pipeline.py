@@ -0,0 +1,303 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+# --- CONFIGURATION ---
+CAPTURE_BUFFER_SIZE = 2  # Frames waiting for detection (oldest dropped when full)
+RESULT_BUFFER_SIZE = 8   # Detection results waiting for the focus/render stage
+RENDER_FPS = 30          # Max rate of imshow/waitKey, independent of capture and detection
+DETECT_WORKERS = 1       # >1 keeps several frames in detection at once (OpenCV releases the GIL)
+
+
+class FrameRing:
+    """Bounded, thread-safe buffer that drops the oldest item when full."""
+
+    def __init__(self, size, on_drop=None):
+        self._items = deque(maxlen=size)
+        self.on_drop = on_drop
+        self._cond = threading.Condition()
+        self.closed = False
+        self.pushed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                if self.on_drop:
+                    self.on_drop(self._items[0])
+            self._items.append(item)
+            self.pushed += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+
+    def take(self, newest=False, timeout=None):
+        """Returns the oldest item (or the newest, discarding the rest), None on timeout/close."""
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            if not newest:
+                return self._items.popleft()
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            if self.on_drop:
+                for stale in self._items:
+                    self.on_drop(stale)
+            self._items.clear()
+            return item
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class FramePacket:
+    """One captured frame travelling through the pipeline."""
+    __slots__ = ("index", "frame", "faces", "focused", "captured_at", "detected_at", "decided_at")
+
+    def __init__(self, index, frame, captured_at):
+        self.index = index
+        self.frame = frame
+        self.faces = ()
+        self.focused = False  # Debounced focus state, set by the consumer (see focus_state.py)
+        self.captured_at = captured_at
+        self.detected_at = None
+        self.decided_at = None
+
+
+class _Latency:
+    """Running count/mean/max of a latency in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        mean = self.total / self.count if self.count else 0.0
+        return {"count": self.count, "mean_ms": round(mean * 1000, 2), "max_ms": round(self.max * 1000, 2)}
+
+
+# --- PIPELINE ---
+class FocusPipeline:
+    """Capture thread -> newest-frame detection thread -> focus/render stage on the caller's thread.
+
+    `detect` takes a BGR frame and returns the face boxes. The caller iterates
+    `results()` for the focus decision on every detection and only draws when
+    `should_render()` says the render stage is due.
+
+    With workers > 1, frames are taken in capture order and detected on a
+    thread pool (`detect` must then be thread-safe). Up to `workers` frames
+    are in flight; frames arriving while the pool is saturated are skipped,
+    and results are released strictly in frame order.
+    """
+
+    def __init__(self, capture, detect, capture_size=CAPTURE_BUFFER_SIZE,
+                 result_size=RESULT_BUFFER_SIZE, render_fps=RENDER_FPS, workers=DETECT_WORKERS):
+        self.capture = capture
+        self.detect = detect
+        self.workers = max(1, workers)
+        self._in_flight = deque()  # (packet, future) in frame order
+        self._in_flight_cond = threading.Condition()
+        self._dispatch_done = False
+        self._pool = None
+        self.detect_skipped = 0
+        self.capture_ring = FrameRing(capture_size, on_drop=self._recycle)
+        self.result_ring = FrameRing(result_size, on_drop=self._recycle)
+        # Frame buffers of finished/dropped packets, reused by webcam.read(image=...)
+        self._free_frames = deque()
+        self._max_free = capture_size + result_size + self.workers + 2
+        self.render_interval = 1.0 / render_fps if render_fps else 0.0
+        self._next_render = 0.0
+        self._stop = threading.Event()
+        self._threads = []
+        self.frames_captured = 0
+        self.frames_rendered = 0
+        self.render_skipped = 0
+        self.detect_latency = _Latency()
+        self.decision_latency = _Latency()
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        if self.workers > 1:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="detect")
+            self._threads += [
+                threading.Thread(target=self._dispatch_loop, name="detect-dispatch", daemon=True),
+                threading.Thread(target=self._reorder_loop, name="detect-reorder", daemon=True),
+            ]
+        else:
+            self._threads.append(threading.Thread(target=self._detect_loop, name="detect", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.capture_ring.close()
+        self.result_ring.close()
+        with self._in_flight_cond:
+            self._in_flight_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _recycle(self, packet):
+        if packet.frame is not None and len(self._free_frames) < self._max_free:
+            self._free_frames.append(packet.frame)
+
+    def _capture_loop(self):
+        reuse = True
+        read_histogram = metrics.histogram("camera_read")
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                buffer = self._free_frames.pop() if reuse and self._free_frames else None
+                if buffer is not None:
+                    try:
+                        success, frame = self.capture.read(buffer)
+                    except TypeError:
+                        reuse = False  # Source without an image= parameter
+                        success, frame = self.capture.read()
+                else:
+                    success, frame = self.capture.read()
+                if not success:
+                    break
+                captured_at = time.perf_counter()
+                read_histogram.observe(captured_at - started)
+                self.capture_ring.put(FramePacket(self.frames_captured, frame, captured_at))
+                self.frames_captured += 1
+        except Exception as e:
+            print(f"Camera read error: {e}")
+        finally:
+            self.capture_ring.close()  # Ends results() instead of leaving the consumer waiting
+
+    def _detect_loop(self):
+        try:
+            while not self._stop.is_set():
+                packet = self.capture_ring.take(newest=True, timeout=0.1)
+                if packet is None:
+                    if self.capture_ring.closed:
+                        break
+                    continue
+                packet.faces = self.detect(packet.frame)
+                packet.detected_at = time.perf_counter()
+                self.detect_latency.add(packet.detected_at - packet.captured_at)
+                self.result_ring.put(packet)
+        except Exception as e:
+            print(f"Detection error: {e}")
+        finally:
+            self.result_ring.close()
+
+    # --- PARALLEL DETECTION (workers > 1) ---
+    def _dispatch_loop(self):
+        """Submits frames in capture order; skips a frame when every worker is busy."""
+        while not self._stop.is_set():
+            packet = self.capture_ring.take(timeout=0.1)
+            if packet is None:
+                if self.capture_ring.closed:
+                    break
+                continue
+            with self._in_flight_cond:
+                if len(self._in_flight) >= self.workers:
+                    self.detect_skipped += 1
+                    self._recycle(packet)
+                    continue
+                self._in_flight.append((packet, self._pool.submit(self.detect, packet.frame)))
+                self._in_flight_cond.notify_all()
+        with self._in_flight_cond:
+            self._dispatch_done = True
+            self._in_flight_cond.notify_all()
+
+    def _reorder_loop(self):
+        """Waits on the oldest in-flight frame so results leave in frame order."""
+        while not self._stop.is_set():
+            with self._in_flight_cond:
+                while not self._in_flight and not self._dispatch_done and not self._stop.is_set():
+                    self._in_flight_cond.wait(0.1)
+                if not self._in_flight:
+                    if self._dispatch_done or self._stop.is_set():
+                        break
+                    continue
+                packet, future = self._in_flight[0]
+            try:
+                packet.faces = future.result()
+            except Exception as e:
+                print(f"Detection error: {e}")
+                packet.faces = ()
+            with self._in_flight_cond:
+                self._in_flight.popleft()
+            packet.detected_at = time.perf_counter()
+            self.detect_latency.add(packet.detected_at - packet.captured_at)
+            self.result_ring.put(packet)
+        self.result_ring.close()
+
+    def results(self):
+        """Yields detected packets in order until the camera stops or stop() is called.
+
+        A packet's frame buffer is recycled once the caller asks for the next one.
+        """
+        previous = None
+        while not self._stop.is_set():
+            packet = self.result_ring.take(timeout=0.1)
+            if packet is None:
+                if self.result_ring.closed:
+                    break
+                continue
+            if previous is not None:
+                self._recycle(previous)
+            packet.decided_at = time.perf_counter()
+            self.decision_latency.add(packet.decided_at - packet.captured_at)
+            previous = packet
+            yield packet
+
+    def should_render(self):
+        """True when the render stage is due; otherwise the frame is counted as skipped."""
+        now = time.perf_counter()
+        if now < self._next_render:
+            self.render_skipped += 1
+            return False
+        self._next_render = now + self.render_interval
+        self.frames_rendered += 1
+        return True
+
+    # --- STATS ---
+    def stats(self):
+        return {
+            "capture": {"frames": self.frames_captured, "depth": self.capture_ring.depth(),
+                        "max_depth": self.capture_ring.max_depth, "dropped": self.capture_ring.dropped},
+            "detect": {"depth": self.result_ring.depth(), "max_depth": self.result_ring.max_depth,
+                       "dropped": self.result_ring.dropped, "latency": self.detect_latency.as_dict(),
+                       "workers": self.workers, "skipped": self.detect_skipped},
+            "render": {"frames": self.frames_rendered, "skipped": self.render_skipped},
+            "capture_to_decision": self.decision_latency.as_dict(),
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (
+            f"Pipeline: captured {s['capture']['frames']} "
+            f"(dropped {s['capture']['dropped']}, max depth {s['capture']['max_depth']}), "
+            f"detected {s['detect']['latency']['count']} on {s['detect']['workers']} worker(s) "
+            f"(dropped {s['detect']['dropped']}, skipped {s['detect']['skipped']}, "
+            f"max depth {s['detect']['max_depth']}), "
+            f"rendered {s['render']['frames']} (skipped {s['render']['skipped']}), "
+            f"capture->decision mean {s['capture_to_decision']['mean_ms']} ms "
+            f"/ max {s['capture_to_decision']['max_ms']} ms"
+        )
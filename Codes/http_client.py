@@ -0,0 +1,188 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- CONFIGURATION ---
+CONNECT_TIMEOUT = 2.0    # Seconds to establish the connection
+READ_TIMEOUT = 4.0       # Seconds to wait for the response
+POOL_SIZE = 8
+WEATHER_API_URL = os.environ.get("WEATHER_API_URL", "http://api.openweathermap.org/data/2.5/weather")
+WEATHER_TTL = 600        # Answer from cache without any request for this long
+WEATHER_STALE_TTL = 3600 # Past the TTL, answer stale and refresh in the background up to this age
+PREFETCH_TOP = 3         # Keep this many of the most-asked cities warm
+PREFETCH_INTERVAL = 300
+CITY_STATS_FILE = os.path.join(os.path.expanduser("~"), ".visionvoice", "weather_cities.json")
+
+
+# --- SHARED SESSION ---
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Returns the process-wide requests.Session with a keep-alive connection pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            retry = Retry(total=1, connect=1, read=0, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def get_json(url, params=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """GET through the shared pool with strict connect/read timeouts."""
+    response = get_session().get(url, params=params, timeout=timeout)
+    return response.json()
+
+
+# --- CACHE ---
+class TTLCache:
+    """Thread-safe dict of key -> (value, stored_at)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (value, age_seconds) or (None, None)."""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None, None
+        value, stored_at = entry
+        return value, time.monotonic() - stored_at
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+
+
+def normalize_city(city):
+    return " ".join(city.lower().replace(",", " ").split())
+
+
+# --- WEATHER ---
+class WeatherClient:
+    """OpenWeatherMap lookups with a TTL cache, stale-while-revalidate and prefetch of frequent cities."""
+
+    def __init__(self, api_key, base_url=WEATHER_API_URL, ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL,
+                 stats_file=CITY_STATS_FILE):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats_file = stats_file
+        self.cache = TTLCache()
+        self.city_counts = Counter(self._load_stats())
+        self._stats_dirty = False
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._prefetch_thread = None
+        atexit.register(self.save_stats)
+
+    def lookup(self, city):
+        """Returns the OpenWeatherMap JSON for a city, from cache when fresh enough."""
+        key = normalize_city(city)
+        self._count(key)
+        data, age = self.cache.get(key)
+        if data is not None and age < self.ttl:
+            return data
+        if data is not None and age < self.stale_ttl:
+            self._refresh_async(key)
+            return data
+        return self._fetch(key)
+
+    def _fetch(self, key):
+        data = get_json(self.base_url, params={"q": key, "appid": self.api_key, "units": "metric"})
+        if str(data.get("cod")) == "200":
+            self.cache.put(key, data)
+        return data
+
+    def _refresh_async(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key)
+            except (requests.RequestException, ValueError):
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"weather-refresh-{key}", daemon=True).start()
+
+    # --- FREQUENT CITIES ---
+    def _count(self, key):
+        """In memory only; the prefetch thread and exit write the counts to disk."""
+        with self._lock:
+            self.city_counts[key] += 1
+            self._stats_dirty = True
+
+    def save_stats(self):
+        with self._lock:
+            if not self._stats_dirty:
+                return
+            counts = dict(self.city_counts)
+            self._stats_dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+            tmp = self.stats_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(counts, f)
+            os.replace(tmp, self.stats_file)
+        except OSError:
+            pass
+
+    def _load_stats(self):
+        try:
+            with open(self.stats_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def start_prefetch(self, top=PREFETCH_TOP, interval=PREFETCH_INTERVAL):
+        """Keeps the most-asked cities warm on a background thread."""
+        if self._prefetch_thread is not None:
+            return
+
+        def prefetch():
+            while True:
+                with self._lock:
+                    cities = [city for city, _ in self.city_counts.most_common(top)]
+                for city in cities:
+                    _, age = self.cache.get(city)
+                    if age is None or age >= self.ttl:
+                        try:
+                            self._fetch(city)
+                        except (requests.RequestException, ValueError):
+                            pass
+                self.save_stats()
+                time.sleep(interval)
+
+        self._prefetch_thread = threading.Thread(target=prefetch, name="weather-prefetch", daemon=True)
+        self._prefetch_thread.start()
+
+
+_weather_clients = {}
+_clients_lock = threading.Lock()
+
+def get_weather_client(api_key):
+    """Returns the shared WeatherClient for an API key, starting prefetch on first use."""
+    with _clients_lock:
+        client = _weather_clients.get(api_key)
+        if client is None:
+            client = _weather_clients[api_key] = WeatherClient(api_key)
+            client.start_prefetch()
+        return client
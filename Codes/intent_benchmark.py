@@ -0,0 +1,80 @@
+"""Accuracy and throughput benchmark for the intent engine.
+
+    python intent_benchmark.py [--corpus intent_corpus.tsv] [--repeat 2000] [--out intents.json]
+"""
+import argparse
+import json
+import os
+import time
+
+import intents
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.tsv")
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    """Returns (intent, expected slot value or None, utterance) rows."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            intent, slot, utterance = line.rstrip("\n").split("\t")
+            rows.append((intent, None if slot == "-" else slot, utterance))
+    return rows
+
+
+def evaluate(rows):
+    intent_hits = 0
+    slot_hits = 0
+    slot_total = 0
+    errors = []
+    for intent, slot, utterance in rows:
+        match = intents.classify(utterance)
+        value = next(iter(match.slots.values()), None) if match.slots else None
+        if match.intent == intent:
+            intent_hits += 1
+        if slot is not None:
+            slot_total += 1
+            slot_hits += value == slot
+        if match.intent != intent or (slot is not None and value != slot):
+            errors.append({"utterance": utterance, "expected": [intent, slot], "got": [match.intent, value]})
+    return {
+        "utterances": len(rows),
+        "intent_accuracy": round(intent_hits / len(rows), 4) if rows else 0.0,
+        "slot_accuracy": round(slot_hits / slot_total, 4) if slot_total else 0.0,
+        "errors": errors,
+    }
+
+
+def throughput(rows, repeat):
+    utterances = [u for _, _, u in rows]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for utterance in utterances:
+            intents.classify(utterance)
+    elapsed = time.perf_counter() - start
+    count = repeat * len(utterances)
+    return {"queries": count, "queries_per_second": round(count / elapsed), "us_per_query": round(elapsed / count * 1e6, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Intent engine accuracy / throughput benchmark.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--out", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    rows = load_corpus(args.corpus)
+    report = evaluate(rows)
+    report["throughput"] = throughput(rows, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import re
+from collections import namedtuple
+
+# --- INTENT TABLE ---
+# intent: trigger phrases. A phrase matches whole tokens, so 'time' no longer
+# fires on "sometimes". Longer phrases score higher; ties go to the earlier row.
+INTENT_TABLE = [
+    ("exit", ["exit", "stop", "bye", "goodbye", "quit"]),
+    ("cancel", ["cancel", "never mind", "nevermind", "stop that", "be quiet", "forget it"]),
+    ("get_time", ["time", "what time is it", "current time"]),
+    ("tell_joke", ["joke", "tell me a joke", "make me laugh"]),
+    ("tell_fact", ["fun fact", "fact"]),
+    ("tell_quote", ["quote", "motivational quote"]),
+    ("search_wikipedia", ["wikipedia", "wiki", "search wikipedia", "search wikipedia for"]),
+    ("play_youtube", ["youtube", "play song", "play video", "play the song", "play the video", "play"]),
+    ("search_google", ["search", "google", "look up", "search for", "google for"]),
+    ("get_weather", ["weather", "temperature", "forecast"]),
+    ("control_music", ["pause", "resume", "volume", "volume up", "volume down"]),
+    ("switch_to_vision", ["face detection", "switch to face detection"]),
+]
+
+# Words that carry no slot content when they lead or trail the slot text
+LEADING_FILLER = {
+    "a", "an", "the", "me", "please", "can", "you", "could", "would", "what's", "what", "is", "it",
+    "how's", "tell", "about", "for", "on", "in", "at", "of", "show", "find", "song", "video", "some",
+    "today", "now", "like", "whats", "hows",
+}
+TRAILING_FILLER = {"please", "now", "today", "on", "for", "in", "at", "thanks", "like"}
+# Phrases that mean "wherever I am" for the weather city slot
+HERE_PHRASES = {"near me", "my location", "here", "outside"}
+
+IntentMatch = namedtuple("IntentMatch", ["intent", "score", "slots"])
+UNKNOWN = IntentMatch("unknown", 0, {})
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    """Lowercases and splits text into word tokens (apostrophes kept)."""
+    return _TOKEN_RE.findall(text.lower().replace("’", "'"))
+
+
+class IntentEngine:
+    """Token-trie intent classifier with slot extraction, built once from a table."""
+
+    def __init__(self, table=INTENT_TABLE):
+        self.order = {intent: i for i, (intent, _) in enumerate(table)}
+        self.trie = {}
+        self.max_phrase = 1
+        for intent, phrases in table:
+            for phrase in phrases:
+                tokens = tokenize(phrase)
+                node = self.trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(None, []).append(intent)
+                self.max_phrase = max(self.max_phrase, len(tokens))
+
+    def _matches(self, tokens):
+        """Yields (intent, start, end) for every trigger phrase found in the tokens."""
+        for start in range(len(tokens)):
+            node = self.trie
+            for end in range(start, min(len(tokens), start + self.max_phrase)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                for intent in node.get(None, ()):
+                    yield intent, start, end + 1
+
+    def rank(self, query):
+        """Returns every matching intent as IntentMatch, best first."""
+        tokens = tokenize(query)
+        spans = {}
+        scores = {}
+        for intent, start, end in self._matches(tokens):
+            scores[intent] = scores.get(intent, 0) + (end - start)
+            spans.setdefault(intent, []).append((start, end))
+        ranked = sorted(scores, key=lambda i: (-scores[i], self.order[i]))
+        return [IntentMatch(i, scores[i], extract_slots(i, tokens, spans[i])) for i in ranked]
+
+    def classify(self, query):
+        """Returns the best IntentMatch, or UNKNOWN."""
+        ranked = self.rank(query)
+        return ranked[0] if ranked else UNKNOWN
+
+
+# --- SLOTS ---
+def _remainder(tokens, spans):
+    """Tokens outside the trigger spans with filler words trimmed from both ends."""
+    covered = set()
+    for start, end in spans:
+        covered.update(range(start, end))
+    rest = [t for i, t in enumerate(tokens) if i not in covered]
+    while rest and rest[0] in LEADING_FILLER:
+        rest.pop(0)
+    while rest and rest[-1] in TRAILING_FILLER:
+        rest.pop()
+    return " ".join(rest)
+
+def extract_slots(intent, tokens, spans):
+    if intent == "get_weather":
+        # The city follows "in"/"for"/"at" when present ("what's the weather in new delhi")
+        text = f" {' '.join(tokens)} "
+        if any(f" {phrase} " in text for phrase in HERE_PHRASES):
+            return {"city": "here"}
+        for i in range(len(tokens) - 1, -1, -1):
+            if tokens[i] in ("in", "for", "at") and i + 1 < len(tokens):
+                return {"city": _remainder(tokens[i + 1:], [])}
+        return {"city": _remainder(tokens, spans)}
+    if intent in ("search_google", "search_wikipedia"):
+        return {"term": _remainder(tokens, spans)}
+    if intent == "play_youtube":
+        return {"song": _remainder(tokens, spans)}
+    if intent == "control_music":
+        text = " ".join(tokens)
+        for action in ("volume up", "volume down", "pause", "resume"):
+            if action in text:
+                return {"action": action}
+        return {}
+    return {}
+
+
+# --- SHARED ENGINE ---
+_engine = IntentEngine()
+
+def classify(query):
+    return _engine.classify(query)
+
+def rank(query):
+    return _engine.rank(query)
@@ -0,0 +1,170 @@
+"""Short video clips of focus lapses for later review (off unless VISION_LAPSE_CLIPS=1).
+
+The focus loop hands every frame to add(); only a few per second are
+downscaled into a preallocated pre-roll ring. On a lapse the ring is handed
+off whole (no copy) and the next few seconds follow it to a background
+encoder thread, so cv2.VideoWriter never runs on the CV loop.
+"""
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+LAPSE_CLIPS = os.environ.get("VISION_LAPSE_CLIPS") == "1"
+LAPSE_CLIP_DIR = os.environ.get("VISION_LAPSE_CLIP_DIR", os.path.join(os.path.expanduser("~"), ".visionvoice", "lapses"))
+LAPSE_CLIP_QUOTA_MB = float(os.environ.get("VISION_LAPSE_CLIP_QUOTA_MB", "200"))  # Oldest clips deleted beyond this
+PREROLL_SECONDS = 3.0     # Video kept from before the lapse
+POSTROLL_SECONDS = 4.0    # Video recorded after it
+CLIP_FPS = 10             # Frames sampled per second (also the clip's playback rate)
+CLIP_WIDTH = 320          # Clips are downscaled to this width
+CLIP_FOURCC = "mp4v"
+ENCODER_BACKLOG = 128     # Frames waiting for the encoder; post-roll frames beyond this are dropped
+
+
+class LapseRecorder:
+    """Pre-roll ring + background encoder. add() and trigger() run on the focus loop thread."""
+
+    def __init__(self, directory=LAPSE_CLIP_DIR, quota_mb=LAPSE_CLIP_QUOTA_MB, fps=CLIP_FPS, width=CLIP_WIDTH,
+                 preroll=PREROLL_SECONDS, postroll=POSTROLL_SECONDS):
+        self.directory = directory
+        self.quota = int(quota_mb * 1024 * 1024)
+        self.fps = fps
+        self.width = width
+        self.postroll = postroll
+        self.interval = 1.0 / fps
+        self.slots = max(1, int(preroll * fps))
+        self._ring = None         # (slots, h, w, 3) uint8, allocated on the first sampled frame
+        self._index = 0
+        self._count = 0
+        self._size = None         # (w, h) of the downscaled frames
+        self._next_sample = 0.0
+        self._clip = None         # Recording in progress: [path, stop_time]
+        self._queue = queue.Queue()  # Unbounded so no put() ever blocks; _record() caps the backlog
+        self._encoder = None
+        self.clips = 0
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- FOCUS LOOP SIDE ---
+    def add(self, frame):
+        """Samples the frame into the pre-roll ring (or the recording clip) at CLIP_FPS."""
+        now = time.monotonic()
+        if now < self._next_sample:
+            return
+        self._next_sample = now + self.interval
+        if self._clip is not None:
+            self._record(frame, now)
+            return
+        if self._ring is None:
+            h, w = frame.shape[:2]
+            self._size = (self.width, max(2, round(h * self.width / w)) & ~1)
+            self._ring = np.empty((self.slots, self._size[1], self._size[0], 3), np.uint8)
+        # Downscales straight into the slot: no allocation, and a private copy of the recycled buffer
+        cv2.resize(frame, self._size, dst=self._ring[self._index], interpolation=cv2.INTER_AREA)
+        self._index = (self._index + 1) % self.slots
+        self._count = min(self._count + 1, self.slots)
+
+    def trigger(self, label="lapse"):
+        """Starts a clip from the pre-roll ring; ignored while one is still recording."""
+        if self._clip is not None or self._ring is None:
+            return None
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{stamp}_{label}.mp4")
+        ring, start, count = self._ring, (self._index - self._count) % self.slots, self._count
+        preroll = [ring[(start + i) % self.slots] for i in range(count)]
+        self._ring, self._index, self._count = None, 0, 0  # The encoder owns the old ring now
+        self._clip = [path, time.monotonic() + self.postroll]
+        self._ensure_encoder()
+        self._queue.put(("open", path, self._size, preroll))  # The whole pre-roll is one item
+        return path
+
+    def _record(self, frame, now):
+        if now >= self._clip[1]:
+            self._finish()
+            return
+        if self._queue.qsize() >= ENCODER_BACKLOG:
+            self.dropped += 1  # Encoder behind: the clip skips a frame, the focus loop never waits
+            return
+        self._queue.put(("frame", cv2.resize(frame, self._size, interpolation=cv2.INTER_AREA)))
+
+    def _finish(self):
+        self._queue.put(("close",))
+        self._clip = None
+
+    # --- ENCODER THREAD ---
+    def _ensure_encoder(self):
+        if self._encoder is None:
+            self._encoder = threading.Thread(target=self._encode_loop, name="lapse-encoder", daemon=True)
+            self._encoder.start()
+
+    def _encode_loop(self):
+        writer = None
+        path = None
+        while True:
+            item = self._queue.get()
+            kind = item[0]
+            if kind == "open":
+                _, path, size, preroll = item
+                self._enforce_quota()
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*CLIP_FOURCC), self.fps, size)
+                if not writer.isOpened():
+                    print(f"Could not open clip writer for {path}")
+                    writer = None
+                for image in preroll if writer is not None else ():
+                    writer.write(image)
+            elif kind == "frame":
+                if writer is not None:
+                    writer.write(item[1])
+            elif kind == "close":
+                if writer is not None:
+                    writer.release()
+                    writer = None
+                    self.clips += 1
+                    print(f"Saved lapse clip: {path}")
+                self._enforce_quota()
+            elif kind == "stop":
+                return
+
+    def _enforce_quota(self):
+        """Deletes the oldest clips until the folder is within the quota."""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp4"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.quota:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue  # Still open (the clip being written)
+            total -= size
+
+    def close(self, timeout=5):
+        """Ends a clip still recording (shorter post-roll) and waits for the encoder."""
+        if self._clip is not None:
+            self._finish()
+        if self._encoder is not None:
+            self._queue.put(("stop",))
+            self._encoder.join(timeout)
+            self._encoder = None
+
+    def stats(self):
+        return {"clips": self.clips, "dropped_frames": self.dropped}
+
+
+def create_recorder():
+    """Returns a LapseRecorder when VISION_LAPSE_CLIPS=1, else None (the focus loop then skips it entirely)."""
+    if not LAPSE_CLIPS:
+        return None
+    try:
+        return LapseRecorder()
+    except OSError as e:
+        print(f"Lapse clips disabled: {e}")
+        return None
@@ -0,0 +1,221 @@
+"""Per-stage timing histograms, a Prometheus text endpoint and an opt-in sampling profiler.
+
+    VISION_METRICS_PORT=9108   serve http://127.0.0.1:9108/metrics
+    VISION_METRICS_DUMP=60     print a stage summary every 60 s
+    VISION_PROFILE=run.folded  sample stacks while running; write folded stacks on exit
+                               (flamegraph.pl run.folded > run.svg, or open in speedscope)
+"""
+import atexit
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.environ.get("VISION_METRICS_PORT", "0"))         # 0 = no endpoint
+METRICS_DUMP_INTERVAL = float(os.environ.get("VISION_METRICS_DUMP", "0"))  # 0 = no periodic dump
+PROFILE_FILE = os.environ.get("VISION_PROFILE")                         # Unset = no profiler
+PROFILE_INTERVAL = 0.005   # Seconds between stack samples
+
+# Upper bounds in seconds, roughly x2.5 apart: 0.1 ms camera reads up to 30 s network intents
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and three additions under a lock.
+
+    Stages such as convert/detect (parallel detection pool) and
+    intent_dispatch (dispatcher pool) are observed from several threads at
+    once, so updates are locked; the lock is uncontended in the common case.
+    """
+    __slots__ = ("name", "counts", "sum", "count", "_lock")
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        """Returns (counts, sum, count) as one consistent copy."""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper bound of the bucket that contains it."""
+        counts, _, count = self.snapshot()
+        return _quantile(counts, count, q)
+
+
+def _quantile(counts, count, q):
+    if not count:
+        return None
+    target = q * count
+    seen = 0
+    for bound, n in zip(BUCKETS + (float("inf"),), counts):
+        seen += n
+        if seen >= target:
+            return bound
+    return float("inf")
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+def histogram(name):
+    h = _histograms.get(name)
+    if h is None:
+        with _histograms_lock:
+            h = _histograms.setdefault(name, Histogram(name))
+    return h
+
+def _sorted_histograms():
+    with _histograms_lock:
+        return sorted(_histograms.items())
+
+def observe(name, seconds):
+    histogram(name).observe(seconds)
+
+@contextmanager
+def timer(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name).observe(time.perf_counter() - started)
+
+
+# --- EXPORT ---
+def render_prometheus():
+    """Returns every histogram in the Prometheus text exposition format."""
+    lines = ["# HELP visionvoice_stage_seconds Time spent per pipeline stage.",
+             "# TYPE visionvoice_stage_seconds histogram"]
+    for name, h in _sorted_histograms():
+        counts, total, count = h.snapshot()
+        cumulative = 0
+        for bound, n in zip(BUCKETS, counts):
+            cumulative += n
+            lines.append(f'visionvoice_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'visionvoice_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+        lines.append(f'visionvoice_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+        lines.append(f'visionvoice_stage_seconds_count{{stage="{name}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def format_summary():
+    """One line per stage: count, mean, p50, p95 and p99 in milliseconds."""
+    rows = [f"{'stage':<18}{'count':>8}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+    for name, h in _sorted_histograms():
+        counts, total, count = h.snapshot()
+        if not count:
+            continue
+        p50, p95, p99 = (_quantile(counts, count, q) * 1000 for q in (0.5, 0.95, 0.99))
+        rows.append(f"{name:<18}{count:>8}{total / count * 1000:>10.2f}{p50:>9g}{p95:>9g}{p99:>9g}")
+    return "\n".join(rows)
+
+
+# --- SAMPLING PROFILER ---
+class SamplingProfiler:
+    """Samples every thread's stack on a timer and writes folded stacks for flame graphs."""
+
+    def __init__(self, path, interval=PROFILE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        """Stops sampling and writes `stack count` lines (Brendan Gregg's folded format)."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+        with open(self.path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"Profiler: {self.samples} samples, {len(self.stacks)} stacks written to {self.path}")
+
+
+# --- STARTUP ---
+_started = False
+_server = None
+_profiler = None
+
+def start():
+    """Starts whichever of the endpoint, periodic dump and profiler are configured (idempotent)."""
+    global _started, _server, _profiler
+    if _started:
+        return
+    _started = True
+    if METRICS_PORT:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            _server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"Metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"Metrics endpoint disabled: {e}")
+    if METRICS_DUMP_INTERVAL:
+        def dump():
+            while True:
+                time.sleep(METRICS_DUMP_INTERVAL)
+                print(format_summary())
+        threading.Thread(target=dump, name="metrics-dump", daemon=True).start()
+    if PROFILE_FILE:
+        _profiler = SamplingProfiler(PROFILE_FILE).start()
+        atexit.register(_profiler.stop)
@@ -0,0 +1,263 @@
+"""Focus monitoring for several cameras or video files, one detection process per stream.
+
+    python multi_stream.py 0 1                       # two USB cameras
+    python multi_stream.py a.mp4 b.mp4 c.mp4 d.mp4   # video files standing in for cameras
+    python multi_stream.py a.mp4 b.mp4 --json out.json --detector lbp
+
+Frames are captured in the supervisor straight into shared-memory slots;
+worker processes read them in place and send back only the face boxes.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from focus_state import FocusStateMachine
+
+# --- CONFIGURATION ---
+SLOTS_PER_STREAM = 3     # Frames in flight per stream (capture -> detection)
+REPORT_INTERVAL = 2.0    # Seconds between console views
+DETECTOR = "haar"
+
+
+# --- WORKER PROCESS ---
+def _worker_main(stream_id, shm_name, shape, slots, jobs, results, detector_name, every_n):
+    """Detects faces in the frames the supervisor places in shared memory."""
+    from detectors import make_detector
+    from tracking import FaceTracker
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frames = np.ndarray((slots,) + shape, np.uint8, buffer=shm.buf)
+        detector = make_detector(detector_name)
+        tracker = FaceTracker(detector, detect_every_n=every_n)
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            slot, index = job
+            started = time.perf_counter()
+            image, scale = detector.prepare(frames[slot])
+            faces = detector.to_frame(tracker.update(image), scale)
+            boxes = [tuple(int(v) for v in box) for box in faces]
+            results.put((stream_id, slot, index, boxes, time.perf_counter() - started))
+        del frames  # Release the buffer export before closing the segment
+    finally:
+        shm.close()
+        results.put((stream_id, None, None, None, None))
+
+
+# --- PER-STREAM STATE ---
+class StreamState:
+    """Focus state and counters for one stream, as seen by the supervisor."""
+
+    def __init__(self, stream_id, source):
+        self.stream_id = stream_id
+        self.source = source
+        self.focused = None
+        self.lapses = 0
+        self.unfocused_since = None
+        self.unfocused_seconds = 0.0
+        self.frames = 0
+        self.dropped = 0
+        self.detect_seconds = 0.0
+        self.started = time.perf_counter()
+        self.finished = False
+        self.focus = FocusStateMachine()
+
+    def update(self, faces, detect_seconds):
+        now = time.perf_counter()
+        self.frames += 1
+        self.detect_seconds += detect_seconds
+        focused = self.focus.update(len(faces) > 0)
+        if self.focus.focused is None or focused == self.focused:
+            return
+        if not focused:
+            if self.focused is not None:
+                self.lapses += 1
+            self.unfocused_since = now
+        elif self.unfocused_since is not None:
+            self.unfocused_seconds += now - self.unfocused_since
+            self.unfocused_since = None
+        self.focused = focused
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "stream": self.stream_id,
+            "source": str(self.source),
+            "state": "-" if self.focused is None else ("FOCUSED" if self.focused else "UNFOCUSED"),
+            "lapses": self.lapses,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "fps": round(self.frames / elapsed, 1) if elapsed else 0.0,
+            "detect_ms": round(self.detect_seconds / self.frames * 1000, 2) if self.frames else None,
+            "finished": self.finished,
+        }
+
+
+# --- SUPERVISOR SIDE OF ONE STREAM ---
+class StreamFeed:
+    """Captures one source into shared-memory slots and feeds its worker process."""
+
+    def __init__(self, stream_id, source, ctx, results, detector, every_n, slots=SLOTS_PER_STREAM):
+        self.stream_id = stream_id
+        self.source = source
+        self.state = StreamState(stream_id, source)
+        self.live = isinstance(source, int)  # Cameras drop frames under load; files wait for a free slot
+        if self.live:
+            import camera
+            self.capture = camera.acquire(source)
+        else:
+            self.capture = cv2.VideoCapture(source)
+        if self.capture is None or not self.capture.isOpened():
+            raise RuntimeError(f"Could not open stream {stream_id}: {source}")
+        success, first = self.capture.read()
+        if not success:
+            raise RuntimeError(f"No frames from stream {stream_id}: {source}")
+        self.shape = first.shape
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * first.nbytes)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, buffer=self.shm.buf)
+        self.free = queue.Queue()
+        for slot in range(1, slots):
+            self.free.put(slot)
+        self.frames[0] = first
+        self.jobs = ctx.Queue()
+        self.jobs.put((0, 0))
+        self.process = ctx.Process(
+            target=_worker_main, name=f"stream-{stream_id}", daemon=True,
+            args=(stream_id, self.shm.name, self.shape, slots, self.jobs, results, detector, every_n),
+        )
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{stream_id}", daemon=True)
+
+    def start(self):
+        self.process.start()
+        self._thread.start()
+        return self
+
+    def _capture_loop(self):
+        index = 1
+        scratch = np.empty(self.shape, np.uint8)
+        while not self._stop.is_set():
+            try:
+                slot = self.free.get(block=not self.live, timeout=0.2)
+            except queue.Empty:
+                if not self.live:
+                    continue
+                slot = None
+            target = self.frames[slot] if slot is not None else scratch
+            success, frame = self.capture.read(target)
+            if not success or frame.shape != self.shape:
+                break
+            if slot is None:
+                self.state.dropped += 1  # Pool saturated: keep the camera current, skip this frame
+                continue
+            if frame is not target:
+                target[:] = frame
+            self.jobs.put((slot, index))
+            index += 1
+        self.jobs.put(None)
+
+    def release_slot(self, slot):
+        self.free.put(slot)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.capture.release()
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+
+class Supervisor:
+    """Starts one StreamFeed + worker process per source and aggregates their focus state."""
+
+    def __init__(self, sources, detector=DETECTOR, every_n=5):
+        self.ctx = mp.get_context("spawn")  # Same behaviour on Windows, macOS and Linux
+        self.results = self.ctx.Queue()
+        self.feeds = [StreamFeed(i, source, self.ctx, self.results, detector, every_n)
+                      for i, source in enumerate(sources)]
+
+    def run(self, duration=None, report_interval=REPORT_INTERVAL):
+        """Collects results until every stream ends (or `duration` seconds pass)."""
+        for feed in self.feeds:
+            feed.start()
+        started = time.perf_counter()
+        next_report = started + report_interval
+        running = len(self.feeds)
+        try:
+            while running:
+                try:
+                    stream_id, slot, index, faces, seconds = self.results.get(timeout=0.2)
+                except queue.Empty:
+                    stream_id = None
+                if stream_id is not None:
+                    feed = self.feeds[stream_id]
+                    if slot is None:
+                        feed.state.finished = True
+                        running -= 1
+                    else:
+                        feed.release_slot(slot)
+                        feed.state.update(faces, seconds)
+                now = time.perf_counter()
+                if report_interval and now >= next_report:
+                    print(self.format_view())
+                    next_report = now + report_interval
+                if duration and now - started >= duration:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for feed in self.feeds:
+                feed.close()
+        return self.summary()
+
+    def summary(self):
+        streams = [feed.state.summary() for feed in self.feeds]
+        return {
+            "streams": streams,
+            "total_fps": round(sum(s["fps"] for s in streams), 1),
+            "total_lapses": sum(s["lapses"] for s in streams),
+            "focused_streams": sum(s["state"] == "FOCUSED" for s in streams),
+        }
+
+    def format_view(self):
+        rows = [f"{'stream':<8}{'source':<24}{'state':<11}{'lapses':>7}{'fps':>7}{'det ms':>8}{'dropped':>9}"]
+        for s in self.summary()["streams"]:
+            det = "-" if s["detect_ms"] is None else s["detect_ms"]
+            rows.append(f"{s['stream']:<8}{s['source'][-23:]:<24}{s['state']:<11}{s['lapses']:>7}"
+                        f"{s['fps']:>7}{det:>8}{s['dropped']:>9}")
+        return "\n".join(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-stream focus monitoring.")
+    parser.add_argument("sources", nargs="+", help="Camera indexes and/or video file paths")
+    parser.add_argument("--detector", default=DETECTOR, help="haar | lbp | dnn")
+    parser.add_argument("--every-n", type=int, default=5, help="Full detection every N frames per stream")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--json", help="Write the final per-stream summary to this file")
+    args = parser.parse_args(argv)
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    supervisor = Supervisor(sources, args.detector, args.every_n)
+    summary = supervisor.run(duration=args.duration)
+    print(supervisor.format_view())
+    print(f"Total: {summary['total_fps']} fps across {len(sources)} streams, {summary['total_lapses']} lapses")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
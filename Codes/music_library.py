@@ -0,0 +1,242 @@
+"""Indexed local music library for spoken "play <song>" requests.
+
+    python music_library.py scan MUSIC_DIR
+    python music_library.py search "shape of you" --dir MUSIC_DIR
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+# --- CONFIGURATION ---
+MUSIC_INDEX_FILE = os.path.join(os.path.expanduser("~"), ".visionvoice", "music_index.json")
+AUDIO_EXTENSIONS = {".mp3", ".ogg", ".wav", ".flac", ".m4a"}
+MIN_MATCH_SCORE = 0.45   # Below this the spoken title is treated as "not in the library"
+NGRAM = 3
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_TRACK_NUMBER = re.compile(r"^\d{1,3}[\s._-]+")
+
+
+def normalize(text):
+    """Lowercase ASCII words: accents folded, punctuation dropped."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+def ngrams(text, n=NGRAM):
+    """Character n-grams of each word, padded so short words and word starts still count."""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+def read_tags(path):
+    """Returns (title, artist, album) from tags when mutagen is installed, else from the file name."""
+    try:
+        import mutagen
+        audio = mutagen.File(path, easy=True)
+        if audio and audio.tags:
+            first = lambda key: (audio.tags.get(key) or [""])[0]
+            if first("title"):
+                return first("title"), first("artist"), first("album")
+    except Exception:
+        pass
+    name = _TRACK_NUMBER.sub("", os.path.splitext(os.path.basename(path))[0])
+    artist, _, title = name.partition(" - ")
+    if not title:
+        artist, title = "", name
+    return title.replace("_", " ").strip(), artist.strip(), os.path.basename(os.path.dirname(path))
+
+
+class MusicLibrary:
+    """Metadata cache of MUSIC_DIR with an n-gram index for fuzzy title/artist lookup.
+
+    Rescans stat every file but only re-read tags for files whose size or
+    mtime changed since the cached entry.
+    """
+
+    def __init__(self, music_dir, index_file=MUSIC_INDEX_FILE):
+        self.music_dir = music_dir
+        self.index_file = index_file
+        self.tracks = []           # [{"path", "size", "mtime", "title", "artist", "album", "key"}]
+        self._postings = {}        # n-gram -> [track ids]
+        self._words = {}           # whole word -> set of track ids
+        self._gram_counts = []     # n-grams per track, for the similarity denominator
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("music_dir") == self.music_dir:
+                self._set_tracks(data["tracks"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp = self.index_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"music_dir": self.music_dir, "tracks": self.tracks}, f)
+            os.replace(tmp, self.index_file)
+        except OSError as e:
+            print(f"Could not save music index: {e}")
+
+    def _set_tracks(self, tracks):
+        tracks = sorted(tracks, key=lambda t: t["path"])
+        postings = defaultdict(list)
+        words = defaultdict(set)
+        gram_counts = []
+        for i, track in enumerate(tracks):
+            grams = ngrams(track["key"])
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+            for word in track["key"].split():
+                words[word].add(i)
+        with self._lock:
+            self.tracks = tracks
+            self._postings = dict(postings)
+            self._words = dict(words)
+            self._gram_counts = gram_counts
+
+    def scan(self):
+        """Rescans the folder; returns (total, re-read) track counts."""
+        started = time.perf_counter()
+        cached = {t["path"]: t for t in self.tracks}
+        tracks = []
+        reread = 0
+        for root, _, files in os.walk(self.music_dir):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in AUDIO_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                track = cached.get(path)
+                if track is None or track["size"] != stat.st_size or track["mtime"] != stat.st_mtime:
+                    title, artist, album = read_tags(path)
+                    track = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime,
+                             "title": title, "artist": artist, "album": album,
+                             "key": normalize(f"{title} {artist}")}
+                    reread += 1
+                tracks.append(track)
+        self._set_tracks(tracks)
+        if reread or len(tracks) != len(cached):
+            self._save()
+        print(f"Music library: {len(tracks)} tracks ({reread} new or changed) "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return len(tracks), reread
+
+    def scan_async(self):
+        threading.Thread(target=self.scan, name="music-scan", daemon=True).start()
+
+    def search(self, query, limit=1):
+        """Returns [(score, track)] best first; score is n-gram Dice similarity plus a whole-word bonus."""
+        key = normalize(query)
+        grams = ngrams(key)
+        if not grams:
+            return []
+        with self._lock:
+            tracks, postings, words, gram_counts = self.tracks, self._postings, self._words, self._gram_counts
+        common = defaultdict(int)
+        for gram in grams:
+            for i in postings.get(gram, ()):
+                common[i] += 1
+        query_words = key.split()
+        scored = []
+        for i, shared in common.items():
+            score = 2 * shared / (len(grams) + gram_counts[i])
+            score += 0.1 * sum(i in words.get(w, ()) for w in query_words) / len(query_words)
+            scored.append((round(score, 3), tracks[i]))
+        scored.sort(key=lambda item: -item[0])
+        return scored[:limit]
+
+    def best_match(self, query, min_score=MIN_MATCH_SCORE):
+        results = self.search(query)
+        if results and results[0][0] >= min_score:
+            return results[0][1]
+        return None
+
+    def next_track(self, track):
+        """The track after `track` in folder order (wrapping), used to queue playback."""
+        with self._lock:
+            tracks = self.tracks
+        if not tracks:
+            return None
+        index = next((i for i, t in enumerate(tracks) if t["path"] == track["path"]), -1)
+        return tracks[(index + 1) % len(tracks)]
+
+
+class Player:
+    """Plays library tracks on pygame.mixer.music and queues the next one so it starts without a gap."""
+
+    def __init__(self, mixer, library):
+        self.mixer = mixer
+        self.library = library
+        self.current = None
+
+    def play(self, track):
+        music = self.mixer.music
+        music.load(track["path"])
+        music.play()
+        self.current = track
+        upcoming = self.library.next_track(track)
+        if upcoming is not None and upcoming is not track:
+            try:
+                music.queue(upcoming["path"])  # Decoder opens it now; playback continues seamlessly
+            except Exception as e:
+                print(f"Could not queue next track: {e}")
+        return track
+
+
+# --- SHARED LIBRARY ---
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+def get_library(music_dir):
+    """Returns the library for a folder, loading the cached index and rescanning in the background."""
+    with _libraries_lock:
+        library = _libraries.get(music_dir)
+        if library is None:
+            library = _libraries[music_dir] = MusicLibrary(music_dir)
+            library.scan_async()
+        return library
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local music library index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    scan_cmd = sub.add_parser("scan", help="Scan (incrementally) and save the index")
+    scan_cmd.add_argument("music_dir")
+    search_cmd = sub.add_parser("search", help="Fuzzy-search titles and artists")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--dir", required=True)
+    search_cmd.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "scan":
+        MusicLibrary(args.music_dir).scan()
+    else:
+        library = MusicLibrary(args.dir)
+        if not library.tracks:
+            library.scan()
+        started = time.perf_counter()
+        results = library.search(args.query, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for score, track in results:
+            print(f"{score:.3f}  {track['title']} - {track['artist']}  ({track['path']})")
+        print(f"({elapsed:.2f} ms over {len(library.tracks)} tracks)")
+
+
+if __name__ == "__main__":
+    main()
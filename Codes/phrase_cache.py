@@ -0,0 +1,154 @@
+import hashlib
+import io
+import os
+import re
+import wave
+from collections import OrderedDict
+
+# --- CONFIGURATION ---
+PHRASE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".visionvoice", "phrases")
+PHRASE_CACHE_MAX_BYTES = 64 * 1024 * 1024   # Least recently played segments are evicted beyond this
+PHRASE_MEMORY_SEGMENTS = 256                 # Decoded segments kept in RAM
+PHRASE_CACHE_VERSION = "1"                   # Bump when the TTS voice or rate changes
+
+_NUMBER_OR_TIME = re.compile(r"(\d{1,2}:\d{2}(?::\d{2})?|\d+)")
+_SPEAKABLE = re.compile(r"[A-Za-z0-9]")
+_TRAILING_PUNCTUATION = ".,;:!?"
+
+
+def split_segments(text):
+    """Splits text into fixed phrases and numbers, each rendered (and cached) on its own.
+
+    "Unfocused! This is lapse number 12." -> ["Unfocused! This is lapse number", "12"]
+    "It is 10:05:30." -> ["It is", "10", "oh 5", "30"]
+    "Volume set to 50 percent." -> ["Volume set to", "50", "percent"]
+
+    Trailing punctuation is dropped so a phrase matches its cached segment
+    whether or not it ends a sentence.
+    """
+    segments = []
+    for i, part in enumerate(_NUMBER_OR_TIME.split(text)):
+        if i % 2:
+            if ":" in part:
+                hours, *rest = (int(p) for p in part.split(":"))
+                segments.append(str(hours))
+                segments += [f"oh {n}" if n < 10 else str(n) for n in rest]  # Minutes / seconds
+            else:
+                segments.append(str(int(part)))
+        else:
+            part = part.strip().rstrip(_TRAILING_PUNCTUATION).rstrip()
+            if _SPEAKABLE.search(part):
+                segments.append(part)
+    return segments
+
+
+class PhraseCache:
+    """WAV files of rendered phrase segments, joined and played through pygame.mixer.
+
+    Rendering needs the pyttsx3 engine, so render() is only called from the
+    speech worker thread (see speech.py).
+    """
+
+    def __init__(self, directory=PHRASE_CACHE_DIR, max_bytes=PHRASE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._memory = OrderedDict()  # segment -> (wave params, frames)
+        self._mixer = None
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+
+    def path(self, segment):
+        digest = hashlib.sha1(f"{PHRASE_CACHE_VERSION}\0{segment.lower()}".encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def missing(self, text):
+        """Segments of `text` that have no rendered audio yet."""
+        return [s for s in split_segments(text) if s not in self._memory and not os.path.exists(self.path(s))]
+
+    # --- RENDERING (speech worker thread) ---
+    def render(self, engine, segment):
+        path = self.path(segment)
+        if os.path.exists(path):
+            return
+        tmp = path + ".tmp.wav"
+        try:
+            engine.save_to_file(segment, tmp)
+            engine.runAndWait()
+            os.replace(tmp, path)
+            self.rendered += 1
+        except Exception as e:
+            print(f"Phrase render failed for '{segment}': {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".wav") and not name.endswith(".tmp.wav"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    # --- PLAYBACK ---
+    def _segment_audio(self, segment):
+        audio = self._memory.get(segment)
+        if audio is not None:
+            self._memory.move_to_end(segment)
+            return audio
+        path = self.path(segment)
+        try:
+            with wave.open(path, "rb") as f:
+                audio = (f.getparams()[:3], f.readframes(f.getnframes()))
+            os.utime(path)  # mtime doubles as "last played" for eviction
+        except (OSError, EOFError, wave.Error):
+            return None
+        self._memory[segment] = audio
+        if len(self._memory) > PHRASE_MEMORY_SEGMENTS:
+            self._memory.popitem(last=False)
+        return audio
+
+    def get_mixer(self):
+        """Returns pygame.mixer (reusing an existing init), or None when pygame is unavailable."""
+        if self._mixer is None:
+            try:
+                import pygame
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self._mixer = pygame.mixer
+            except Exception:
+                self._mixer = False
+        return self._mixer or None
+
+    def sound(self, text):
+        """Joins the cached segments of `text` into one pygame Sound; None if any segment is missing."""
+        segments = split_segments(text)
+        parts = [self._segment_audio(s) for s in segments]
+        if not parts or any(p is None for p in parts) or len({p[0] for p in parts}) != 1:
+            self.misses += 1
+            return None
+        mixer = self.get_mixer()
+        if mixer is None:
+            return None
+        channels, width, rate = parts[0][0]
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(channels)
+            out.setsampwidth(width)
+            out.setframerate(rate)
+            out.writeframes(b"".join(frames for _, frames in parts))
+        buffer.seek(0)
+        self.hits += 1
+        return mixer.Sound(file=buffer)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "rendered": self.rendered,
+                "in_memory": len(self._memory)}
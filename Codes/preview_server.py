@@ -0,0 +1,184 @@
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+
+# --- CONFIGURATION ---
+PREVIEW_HOST = "127.0.0.1"   # Local only
+PREVIEW_PORT = int(os.environ.get("VISION_PREVIEW_PORT", "8765"))
+PREVIEW_FPS = 10             # MJPEG frames per second sent to clients
+JPEG_QUALITY = 70
+PREVIEW_WIDTH = 640          # Preview frames are downscaled to this width before encoding
+
+BOUNDARY = "frame"
+
+
+class PreviewServer:
+    """Local HTTP endpoint: MJPEG preview, focus state as JSON and a control API.
+
+        GET  /stream.mjpg          rate-limited MJPEG preview
+        GET  /state                current focus state (JSON)
+        GET  /metrics              stage timing histograms (Prometheus text, see metrics.py)
+        POST /control?action=exit  stop the running mode
+        POST /control?action=mode&mode=face|focus|smart   (headless runner only)
+
+    Frames are only encoded while at least one preview client is connected.
+    """
+
+    def __init__(self, host=PREVIEW_HOST, port=PREVIEW_PORT, fps=PREVIEW_FPS):
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / fps
+        self.clients = 0
+        self.commands = queue.Queue()
+        self.state = {}
+        self.requested = None  # Last command that stopped a mode, for the headless runner in start.py
+        self.accepts_modes = False  # Set by that runner; windowed modes have nobody to switch modes
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._next_encode = 0.0
+        self._cond = threading.Condition()
+        self._httpd = None
+
+    def start(self):
+        if self._httpd is not None:
+            return self
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/stream.mjpg":
+                    server._stream(self)
+                elif path == "/state":
+                    self._json(200, server.state)
+                elif path == "/metrics":
+                    import metrics
+                    body = metrics.render_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    try:
+                        params.update(json.loads(self.rfile.read(length)))
+                    except ValueError:
+                        return self._json(400, {"error": "invalid JSON"})
+                if url.path != "/control" or params.get("action") not in ("exit", "mode"):
+                    return self._json(400, {"error": "expected /control with action=exit|mode"})
+                if params["action"] == "mode" and not server.accepts_modes:
+                    return self._json(400, {"error": "mode switching needs start.py --headless; use action=exit"})
+                server.commands.put((params["action"], params.get("mode")))
+                self._json(202, {"accepted": params})
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name="preview-server", daemon=True).start()
+        print(f"Preview: http://{self.host}:{self.port}/stream.mjpg  state: /state  control: POST /control")
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    # --- PRODUCER SIDE (focus loop) ---
+    def wants_frame(self):
+        """True when a client is connected and the next preview frame is due."""
+        return self.clients > 0 and time.perf_counter() >= self._next_encode
+
+    def publish_frame(self, frame):
+        if not self.wants_frame():
+            return
+        self._next_encode = time.perf_counter() + self.interval
+        if frame.shape[1] > PREVIEW_WIDTH:
+            scale = PREVIEW_WIDTH / frame.shape[1]
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            with self._cond:
+                self._jpeg = jpeg.tobytes()
+                self._jpeg_seq += 1
+                self._cond.notify_all()
+
+    def publish_state(self, state):
+        self.state = dict(state)
+
+    def poll_command(self):
+        """Returns the next (action, mode) control command, or None."""
+        try:
+            return self.commands.get_nowait()
+        except queue.Empty:
+            return None
+
+    def has_command(self):
+        return not self.commands.empty()
+
+    def wait_command(self):
+        """Blocks until the next control command (used while no mode is running)."""
+        return self.commands.get()
+
+    # --- CLIENT SIDE ---
+    def _stream(self, handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        with self._cond:
+            self.clients += 1
+        seen = -1
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._jpeg_seq != seen, timeout=5)
+                    jpeg, seen = self._jpeg, self._jpeg_seq
+                if jpeg is None:
+                    continue
+                handler.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+
+# --- SHARED SERVER ---
+_server = None
+_server_lock = threading.Lock()
+
+def get_server():
+    """Returns the process-wide preview server, starting it on first use."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = PreviewServer().start()
+        return _server
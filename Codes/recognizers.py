@@ -0,0 +1,164 @@
+import json
+import os
+import re
+
+import speech_recognition as sr
+
+# --- CONFIGURATION ---
+RECOGNIZER_BACKEND = os.environ.get("VOICE_RECOGNIZER", "google")  # google | vosk | sphinx | scripted
+VOICE_SCRIPT = os.environ.get("VOICE_SCRIPT")  # Transcript file (one utterance per line) for the scripted backend
+LANGUAGE = "en-in"
+WAKE_WORDS = ("assistant", "hey vision")
+VOSK_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk-model-small-en-in-0.4")
+VOSK_SAMPLE_RATE = 16000
+
+
+class Recognizer:
+    """Backend interface: recognize(audio) returns lowercase text.
+
+    Raises sr.UnknownValueError when nothing intelligible was said and
+    sr.RequestError when the backend itself is unavailable.
+    """
+    name = "base"
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+# --- BACKENDS ---
+class GoogleRecognizer(Recognizer):
+    """Google Web Speech API (network round trip per utterance)."""
+    name = "google"
+
+    def __init__(self, language=LANGUAGE):
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self._recognizer.recognize_google(audio, language=self.language).lower()
+
+
+class SphinxRecognizer(Recognizer):
+    """CMU PocketSphinx through speech_recognition (offline)."""
+    name = "sphinx"
+
+    def __init__(self, keywords=None, sensitivity=0.8):
+        self._recognizer = sr.Recognizer()
+        self.keyword_entries = [(k, sensitivity) for k in keywords] if keywords else None
+
+    def recognize(self, audio):
+        return self._recognizer.recognize_sphinx(audio, keyword_entries=self.keyword_entries).lower().strip()
+
+
+class VoskRecognizer(Recognizer):
+    """Vosk/Kaldi offline recognizer; a grammar restricts it to a few phrases (cheap keyword spotting)."""
+    name = "vosk"
+
+    def __init__(self, model_dir=VOSK_MODEL_DIR, grammar=None):
+        try:
+            import vosk
+        except ImportError:
+            raise sr.RequestError("vosk is not installed (pip install vosk)")
+        if not os.path.isdir(model_dir):
+            raise sr.RequestError(f"Vosk model not found: {model_dir}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self._model = vosk.Model(model_dir)
+        self.grammar = json.dumps(list(grammar) + ["[unk]"]) if grammar else None
+
+    def recognize(self, audio):
+        if self.grammar:
+            rec = self._vosk.KaldiRecognizer(self._model, VOSK_SAMPLE_RATE, self.grammar)
+        else:
+            rec = self._vosk.KaldiRecognizer(self._model, VOSK_SAMPLE_RATE)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2))
+        text = json.loads(rec.FinalResult()).get("text", "").replace("[unk]", "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class ScriptedRecognizer(Recognizer):
+    """Offline/test stand-in that returns queued transcripts in order, one per utterance.
+
+    With no transcripts given, they are read from the VOICE_SCRIPT file.
+    """
+    name = "scripted"
+
+    def __init__(self, transcripts=None):
+        if transcripts is None and VOICE_SCRIPT:
+            with open(VOICE_SCRIPT, encoding="utf-8") as f:
+                transcripts = [line.strip() for line in f if line.strip()]
+        self.transcripts = list(transcripts or ())
+
+    def recognize(self, audio):
+        if not self.transcripts:
+            raise sr.UnknownValueError()
+        return self.transcripts.pop(0).lower()
+
+
+BACKENDS = {
+    "google": GoogleRecognizer,
+    "sphinx": SphinxRecognizer,
+    "vosk": VoskRecognizer,
+    "scripted": ScriptedRecognizer,
+}
+
+def make_backend(name=RECOGNIZER_BACKEND, **kwargs):
+    try:
+        return BACKENDS[name.lower()](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown recognizer '{name}'. Choose from: {', '.join(BACKENDS)}")
+
+
+# --- WAKE-WORD GATING ---
+class WakeWordGate(Recognizer):
+    """Runs a cheap local keyword spotter first; only addressed speech reaches the full backend.
+
+    recognize() returns None for speech that did not contain a wake word, and
+    strips the wake word from the recognized command.
+    """
+    name = "wake-word"
+
+    def __init__(self, backend, spotter, wake_words=WAKE_WORDS):
+        self.backend = backend
+        self.spotter = spotter
+        self.wake_words = wake_words
+        self._strip = re.compile(r"\b(" + "|".join(re.escape(w) for w in wake_words) + r")\b")
+        self.gated = 0
+        self.passed = 0
+
+    def recognize(self, audio):
+        try:
+            heard = self.spotter.recognize(audio)
+        except sr.UnknownValueError:
+            heard = ""
+        if not any(word in heard for word in self.wake_words):
+            self.gated += 1
+            return None
+        self.passed += 1
+        return " ".join(self._strip.sub(" ", self.backend.recognize(audio)).split())
+
+
+def make_spotter(wake_words=WAKE_WORDS):
+    """Best available offline keyword spotter: Vosk with a tiny grammar, else PocketSphinx."""
+    try:
+        return VoskRecognizer(grammar=wake_words)
+    except sr.RequestError:
+        pass
+    try:
+        import pocketsphinx  # noqa: F401
+        return SphinxRecognizer(keywords=wake_words)
+    except ImportError:
+        return None
+
+def get_recognizer(backend=RECOGNIZER_BACKEND, wake_word=False):
+    """Builds the recognizer for take_command(), optionally gated by a wake word."""
+    recognizer = make_backend(backend)
+    if not wake_word:
+        return recognizer
+    spotter = make_spotter()
+    if spotter is None:
+        print("⚠️ No offline keyword spotter available (install vosk or pocketsphinx); wake word disabled.")
+        return recognizer
+    return WakeWordGate(recognizer, spotter)
@@ -0,0 +1,337 @@
+"""Append-only focus-session event log and daily report.
+
+    python session_log.py report [--dir DIR] [--days 30] [--json]
+    python session_log.py stats [--dir DIR]
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import struct
+import threading
+import time
+
+# --- CONFIGURATION ---
+SESSION_LOG_DIR = os.environ.get("SESSION_LOG_DIR",
+                                 os.path.join(os.path.expanduser("~"), ".visionvoice", "sessions"))
+FLUSH_INTERVAL = 2.0            # Seconds between background flushes
+ROTATE_BYTES = 4 * 1024 * 1024  # Start a new segment file past this size
+MAX_LOG_BYTES = int(float(os.environ.get("SESSION_LOG_MAX_MB", "1024")) * 1024 * 1024)  # Oldest segments deleted beyond this
+
+MAGIC = b"VVEVLOG1"
+# timestamp (f8), session (u4), event (u1), pad, name id (u2), value (f4)
+RECORD = struct.Struct("<dIBxHf")
+NAMES_FILE = "names.json"
+
+# --- EVENTS ---
+SESSION_START = 1
+SESSION_END = 2
+FOCUSED = 3
+UNFOCUSED = 4
+LAPSE = 5       # value = lapse duration in seconds
+ALERT = 6       # name = alert kind
+INTENT = 7      # name = intent, value = handler seconds (0 for control intents)
+EVENT_NAMES = {SESSION_START: "session_start", SESSION_END: "session_end", FOCUSED: "focused",
+               UNFOCUSED: "unfocused", LAPSE: "lapse", ALERT: "alert", INTENT: "intent"}
+
+
+class EventLog:
+    """Buffers events in memory and appends them as fixed-size binary records off the hot loop.
+
+    Free-text fields (alert kinds, intent names) are interned to small ids
+    kept in names.json next to the segment files.
+    """
+
+    def __init__(self, directory=SESSION_LOG_DIR, flush_interval=FLUSH_INTERVAL, rotate_bytes=ROTATE_BYTES):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.names = load_names(directory)
+        self._name_ids = {name: i for i, name in enumerate(self.names)}
+        self._pending = []
+        self._pending_lock = threading.Lock()  # Never held during disk I/O
+        self._lock = threading.Lock()
+        self._file = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self._thread.start()
+
+    def log(self, event, session=0, name=None, value=0.0):
+        """Queues one event; costs a tuple append on the caller's thread."""
+        with self._pending_lock:
+            self._pending.append((time.time(), session, event, name, value))
+
+    def _name_id(self, name):
+        if name is None:
+            return 0
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+            with open(os.path.join(self.directory, NAMES_FILE), "w") as f:
+                json.dump(self.names, f)
+        return name_id
+
+    # --- WRITER THREAD ---
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        with self._lock:
+            buffer = bytearray(RECORD.size * len(pending))
+            for i, (ts, session, event, name, value) in enumerate(pending):
+                RECORD.pack_into(buffer, i * RECORD.size, ts, session, event, self._name_id(name), value)
+            try:
+                self._segment().write(buffer)
+                self._file.flush()
+            except OSError as e:
+                print(f"Session log write failed: {e}")
+
+    def _segment(self):
+        if self._file is not None and self._file.tell() >= self.rotate_bytes:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._file = self._reopen_latest()
+        if self._file is None:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            self._file = open(os.path.join(self.directory, f"events-{stamp}.bin"), "ab")
+            self._file.write(MAGIC)
+            self._prune()
+        return self._file
+
+    def _reopen_latest(self):
+        """Appends to the newest segment while it has room, so short runs don't each start a file."""
+        paths = segment_paths(self.directory)
+        if not paths:
+            return None
+        try:
+            size = os.path.getsize(paths[-1])
+            with open(paths[-1], "rb") as f:
+                intact = f.read(len(MAGIC)) == MAGIC
+        except OSError:
+            return None
+        # A torn record (crash mid-write) would misalign everything appended after it
+        if not intact or size >= self.rotate_bytes or (size - len(MAGIC)) % RECORD.size:
+            return None
+        return open(paths[-1], "ab")
+
+    def _prune(self):
+        """Deletes the oldest segments once the log exceeds MAX_LOG_BYTES."""
+        paths = segment_paths(self.directory)
+        sizes = [os.path.getsize(path) for path in paths]
+        total = sum(sizes)
+        for path, size in zip(paths[:-1], sizes):
+            if total <= MAX_LOG_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                print(f"Session log over {MAX_LOG_BYTES // (1024 * 1024)} MB: deleted {os.path.basename(path)}")
+            except OSError:
+                pass
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class Session:
+    """One monitoring run: tracks focus transitions and lapse durations for the log."""
+
+    def __init__(self, log):
+        self.log = log
+        self.id = int(time.time() * 1000) & 0xFFFFFFFF
+        self.unfocused_at = None
+        log.log(SESSION_START, self.id)
+
+    def focused(self):
+        self.log.log(FOCUSED, self.id)
+        if self.unfocused_at is not None:
+            self.log.log(LAPSE, self.id, value=time.time() - self.unfocused_at)
+            self.unfocused_at = None
+
+    def unfocused(self):
+        self.unfocused_at = time.time()
+        self.log.log(UNFOCUSED, self.id)
+
+    def alert(self, kind):
+        self.log.log(ALERT, self.id, name=kind)
+
+    def intent(self, intent, seconds=0.0):
+        """Logs a handled command; `seconds` is the handler's run time."""
+        self.log.log(INTENT, self.id, name=intent, value=seconds)
+
+    def end(self):
+        if self.unfocused_at is not None:
+            self.focused()  # Close the open lapse at its current length
+        self.log.log(SESSION_END, self.id)
+        self.log.flush()
+
+
+# --- SHARED LOG ---
+_log = None
+_log_lock = threading.Lock()
+
+def get_log():
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = EventLog()
+        return _log
+
+class _NullLog:
+    def log(self, *args, **kwargs):
+        pass
+
+    def flush(self):
+        pass
+
+def start_session():
+    """Starts a logged session; logging is disabled (not fatal) when the log cannot be opened."""
+    try:
+        return Session(get_log())
+    except OSError as e:
+        print(f"Session log disabled: {e}")
+        return Session(_NullLog())
+
+
+# --- READING ---
+def segment_paths(directory=SESSION_LOG_DIR):
+    return sorted(glob.glob(os.path.join(directory, "events-*.bin")))
+
+def load_names(directory=SESSION_LOG_DIR):
+    try:
+        with open(os.path.join(directory, NAMES_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return [""]  # Id 0 means "no name"
+
+def load_events(directory=SESSION_LOG_DIR, since=None):
+    """Reads every segment into one structured NumPy array (ts, session, event, name, value)."""
+    import numpy as np
+    dtype = np.dtype([("ts", "<f8"), ("session", "<u4"), ("event", "u1"), ("pad", "u1"),
+                      ("name", "<u2"), ("value", "<f4")])
+    parts = []
+    for path in segment_paths(directory):
+        if since is not None and os.path.getmtime(path) < since:
+            continue
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                continue
+            data = f.read()
+        usable = len(data) - len(data) % dtype.itemsize  # A crash can leave a partial record
+        parts.append(np.frombuffer(data[:usable], dtype=dtype))
+    events = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    if since is not None:
+        events = events[events["ts"] >= since]
+    return events
+
+def daily_report(events, names):
+    """Aggregates events per local day with vectorized NumPy operations."""
+    import numpy as np
+    if len(events) == 0:
+        return []
+    offset = datetime.datetime.now().astimezone().utcoffset().total_seconds()
+    day = ((events["ts"] + offset) // 86400).astype(np.int64)
+    days, day_index = np.unique(day, return_inverse=True)
+    n = len(days)
+    kind = events["event"]
+
+    def count(event):
+        return np.bincount(day_index, weights=kind == event, minlength=n)
+
+    lapse = kind == LAPSE
+    lapse_seconds = np.bincount(day_index, weights=np.where(lapse, events["value"], 0.0), minlength=n)
+    lapses = count(LAPSE)
+    alerts = count(ALERT)
+
+    # Session length = last - first event of each session, credited to the day it started
+    order = np.lexsort((events["ts"], events["session"]))
+    sessions, starts = np.unique(events["session"][order], return_index=True)
+    ends = np.r_[starts[1:], len(order)] - 1
+    session_ts = events["ts"][order]
+    session_seconds = session_ts[ends] - session_ts[starts]
+    session_day = day_index[order][starts]
+    monitored = np.bincount(session_day, weights=session_seconds, minlength=n)
+    session_count = np.bincount(session_day, minlength=n)
+
+    intent_mask = kind == INTENT
+    intent_counts = {}
+    if intent_mask.any():
+        pairs, totals = np.unique(np.stack([day_index[intent_mask], events["name"][intent_mask]], axis=1),
+                                  axis=0, return_counts=True)
+        for (d, name_id), total in zip(pairs, totals):
+            name = names[name_id] if name_id < len(names) else str(name_id)
+            intent_counts.setdefault(int(d), {})[name] = int(total)
+
+    report = []
+    for i in range(n):
+        focused = max(0.0, monitored[i] - lapse_seconds[i])
+        report.append({
+            "date": (datetime.date(1970, 1, 1) + datetime.timedelta(days=int(days[i]))).isoformat(),
+            "sessions": int(session_count[i]),
+            "monitored_min": round(monitored[i] / 60, 1),
+            "focus_pct": round(100 * focused / monitored[i], 1) if monitored[i] else None,
+            "lapses": int(lapses[i]),
+            "mean_lapse_s": round(lapse_seconds[i] / lapses[i], 1) if lapses[i] else None,
+            "alerts": int(alerts[i]),
+            "intents": intent_counts.get(i, {}),
+        })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Focus-session event log.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_cmd = sub.add_parser("report", help="Daily focus report")
+    report_cmd.add_argument("--dir", default=SESSION_LOG_DIR)
+    report_cmd.add_argument("--days", type=int, default=30, help="Only the last N days (0 = all)")
+    report_cmd.add_argument("--json", action="store_true")
+    stats_cmd = sub.add_parser("stats", help="Segment and event counts")
+    stats_cmd.add_argument("--dir", default=SESSION_LOG_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        paths = segment_paths(args.dir)
+        started = time.perf_counter()
+        events = load_events(args.dir)
+        print({"segments": len(paths), "bytes": sum(os.path.getsize(p) for p in paths), "events": len(events),
+               "load_ms": round((time.perf_counter() - started) * 1000, 1)})
+        return
+
+    since = time.time() - args.days * 86400 if args.days else None
+    started = time.perf_counter()
+    report = daily_report(load_events(args.dir, since), load_names(args.dir))
+    elapsed = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'date':<12}{'sessions':>9}{'minutes':>9}{'focus %':>9}{'lapses':>8}{'mean s':>8}{'alerts':>8}  intents")
+    for day in report:
+        focus = "-" if day["focus_pct"] is None else day["focus_pct"]
+        mean = "-" if day["mean_lapse_s"] is None else day["mean_lapse_s"]
+        intents = ", ".join(f"{k} {v}" for k, v in sorted(day["intents"].items()))
+        print(f"{day['date']:<12}{day['sessions']:>9}{day['monitored_min']:>9}{focus:>9}"
+              f"{day['lapses']:>8}{mean:>8}{day['alerts']:>8}  {intents}")
+    print(f"({elapsed:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,25 @@
 import cv2
 import time
 import datetime
-import speech_recognition as sr
-import pyttsx3
 import pyjokes
-import requests
+import http_client
 import random
 import webbrowser
 import threading # Recommended for true parallelism (listening while seeing)
+from vision_engine import VisionEngine, FOCUSED_COLOR, UNFOCUSED_COLOR
+import speech
+import audio_input
+import recognizers
+import intents
+import session_log
+import metrics
+import lapse_recorder
 
 # --- Configuration (from voice_assistant.py) ---
 OPENWEATHERMAP_API_KEY = " YOUR OPENWEATHERMAP KEY "
 UNFOCUS_TIMEOUT = 10 # Seconds until exit in focus mode (from face1.py)
+FOCUS_ALERT_MAX_AGE = 3 # Seconds a queued focus announcement stays relevant
+WAKE_WORD_REQUIRED = True # Always-on listener: only speech starting with a wake word is recognized
 
 # --- Data (from voice_assistant.py) ---
 FUN_FACTS = [
@@ -21,95 +29,124 @@ FUN_FACTS = [
     "A day on Venus is longer than a year on Venus."
 ]
 
+# Rendered into the phrase cache in idle time (numbers cover lapse counts and clock times)
+CACHED_PHRASES = FUN_FACTS + [
+    "Welcome back! Focused. It is",
+    "Unfocused! This is lapse number",
+    "The time is",
+    "AM", "PM",
+] + [str(n) for n in range(60)] + [f"oh {n}" for n in range(10)]
+
 # --- CV/AI Initialization (from face.py and face1.py) ---
 try:
-    face_data = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-    webcam = cv2.VideoCapture(0)
+    vision = VisionEngine('AI Focus Assistant - Enhanced')
 except Exception as e:
     print(f"CV Initialization Error: {e}")
-    webcam = None
-    face_data = None
-
-# --- Voice Initialization (from voice_assistant.py) ---
-try:
-    engine = pyttsx3.init()
-except Exception as e:
-    print(f"Voice Initialization Error: {e}")
-    engine = None
+    vision = None
 
 # --- CORE VOICE FUNCTIONS (Simplified from voice_assistant.py) ---
-def speak(text):
-    """Converts text to speech."""
-    print(f"Assistant: {text}")
-    if engine:
-        engine.say(text)
-        engine.runAndWait()
+def speak(text, block=True, cache=False):
+    """Converts text to speech on the shared speech worker (cache=True for fixed/templated phrases)."""
+    speech.speak(text, priority=speech.PRIORITY_HIGH, block=block, cache=cache)
+
+session = None # session_log.Session for the running assistant
+
+def announce_focus(text, kind):
+    """Queues a focus alert without stalling the CV loop; a burst of flaps coalesces into one."""
+    if session:
+        session.alert(kind)
+    speech.speak(text, priority=speech.PRIORITY_LOW, key="focus", max_age=FOCUS_ALERT_MAX_AGE, cache=True)
+
+_recognizer = None
+
+def get_recognizer():
+    """Builds the (wake-word gated) recognizer on first use."""
+    global _recognizer
+    if _recognizer is None:
+        _recognizer = recognizers.get_recognizer(wake_word=WAKE_WORD_REQUIRED)
+    return _recognizer
 
 def take_command():
-    """Listens for a command and returns it as text."""
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening for command...")
-        r.pause_threshold = 1
-        r.adjust_for_ambient_noise(source)
-        try:
-            audio = r.listen(source, timeout=3, phrase_time_limit=5)
-            query = r.recognize_google(audio, language='en-in')
-            print(f"You said: {query}")
-            return query.lower()
-        except sr.WaitTimeoutError:
-            return "timeout" # User didn't speak
-        except Exception:
-            return "none" # Recognition failed
+    """Takes the next utterance from the always-open microphone stream and returns it as text."""
+    print("Listening for command...")
+    with metrics.timer("listen"):
+        audio = audio_input.get_stream(suppress=speech.is_speaking).get(timeout=3)
+    if audio is None:
+        return "timeout" # User didn't speak
+    try:
+        with metrics.timer("recognize"):
+            query = get_recognizer().recognize(audio)
+        if query is None:
+            return "none" # Background chatter, never sent to the full recognizer
+        print(f"You said: {query}")
+        return query.lower()
+    except Exception:
+        return "none" # Recognition failed
 
 def classify_and_execute(query):
-    """Classifies user intent and executes the command."""
-    if 'exit' in query or 'stop' in query or 'bye' in query:
-        speak("Exiting assistant. Goodbye!")
+    """Classifies user intent (shared engine, see intents.py) and executes the command."""
+    started = time.perf_counter()
+    match = intents.classify(query)
+    intent = match.intent
+    if intent == 'exit':
+        if session:
+            session.intent(intent)
+        speech.get_worker().cancel() # Cut off whatever is being said
+        speak("Exiting assistant. Goodbye!", cache=True)
         return 'exit'
+    if intent == 'cancel':
+        if session:
+            session.intent(intent)
+        speech.get_worker().cancel() # "Stop that" / "be quiet": cut off speech and keep monitoring
+        return 'handled'
     
-    if 'time' in query:
-        speak(f"The time is {datetime.datetime.now().strftime('%I:%M %p')}")
-    elif 'joke' in query:
+    if intent == 'get_time':
+        speak(f"The time is {datetime.datetime.now().strftime('%I:%M %p')}", cache=True)
+    elif intent == 'tell_joke':
         speak(pyjokes.get_joke())
-    elif 'fun fact' in query:
-        speak(random.choice(FUN_FACTS))
-    elif 'weather' in query:
-        city = query.replace("weather in", "").replace("what's the weather in", "").strip()
-        if city and len(city) > 2:
+    elif intent == 'tell_fact':
+        speak(random.choice(FUN_FACTS), cache=True)
+    elif intent == 'get_weather':
+        city = match.slots['city']
+        if city and city != 'here' and len(city) > 2:
             get_weather(city)
         else:
-            speak("Please tell me the city name for the weather.")
-    elif 'search' in query or 'google' in query:
-        search_term = query.replace("search", "").replace("google", "").strip()
+            speak("Please tell me the city name for the weather.", cache=True)
+    elif intent in ('search_google', 'search_wikipedia'):
+        search_term = match.slots['term']
         speak(f"Searching Google for {search_term}")
         webbrowser.open(f"https://www.google.com/search?q={search_term}")
     else:
-        speak("I'm not sure how to handle that command yet.")
+        speak("I'm not sure how to handle that command yet.", cache=True)
+    if session:
+        session.intent(intent, time.perf_counter() - started)
     return 'handled'
 
 def get_weather(city):
     """Fetches and speaks the weather for a given city."""
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={OPENWEATHERMAP_API_KEY}&units=metric"
-        response = requests.get(url)
-        data = response.json()
-        if data["cod"] == 200:
+        # Pooled, timeout-bounded and cached per city (see http_client.py)
+        data = http_client.get_weather_client(OPENWEATHERMAP_API_KEY).lookup(city)
+        if str(data.get("cod")) == "200":
             temp = data["main"]["temp"]
             desc = data["weather"][0]["description"]
             speak(f"The temperature in {city} is {temp}°C with {desc}.")
         else:
             speak(f"I couldn't find weather information for {city}.")
     except Exception:
-        speak("Sorry, I could not fetch weather data right now.")
+        speak("Sorry, I could not fetch weather data right now.", cache=True)
 
 # --- MAIN INTEGRATED LOOP ---
 def run_smart_assistant():
-    if not webcam or not face_data:
-        speak("Critical components failed to load. Cannot run the assistant.")
+    if not vision or not vision.is_ready():
+        speak("Critical components failed to load. Cannot run the assistant.", cache=True)
         return
 
-    speak("Welcome! I am your AI Focus Assistant. Starting monitoring mode.")
+    speak("Welcome! I am your AI Focus Assistant. Starting monitoring mode.", cache=True)
+    speech.prerender(CACHED_PHRASES)
+    global session
+    session = session_log.start_session()
+    recorder = lapse_recorder.create_recorder() # None unless VISION_LAPSE_CLIPS=1
     
     # State tracking variables (from face1.py)
     focused = False # Initial state: assumed unfocused
@@ -129,7 +166,8 @@ def run_smart_assistant():
         while assistant_running:
             query = take_command()
             if query not in ["none", "timeout"]:
-                action = classify_and_execute(query)
+                with metrics.timer("intent_dispatch"):
+                    action = classify_and_execute(query)
                 if action == 'exit':
                     assistant_running = False
 
@@ -138,85 +176,75 @@ def run_smart_assistant():
     voice_thread.daemon = True # Allows program to exit even if thread is running
     voice_thread.start()
 
-    # --- CV/Focus Loop ---
-    while assistant_running:
-        success, frame = webcam.read()
-        if not success:
+    # --- CV/Focus Loop (capture and detection run on pipeline threads) ---
+    for packet in vision.frames():
+        if not assistant_running:
             break
-
-        gray_img = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        face_co = face_data.detectMultiScale(gray_img, scaleFactor=1.5, minNeighbors=5)
-        
-        thumb_size = (300, 300)
+        frame = packet.frame
+        face_co = packet.faces
 
         # --- FOCUS/UNFOCUS LOGIC ---
-        face_detected = len(face_co) > 0
+        face_detected = packet.focused # Debounced over recent frames, see focus_state.py
+        if recorder:
+            recorder.add(frame) # Pre-roll for lapse clips (a few downscaled frames per second)
         
         if face_detected:
             # FOCUSED
-            (x, y, w, h) = face_co[0]
-            face_roi = frame[y:y+h, x:x+w]
-            thumbnail = cv2.resize(face_roi, thumb_size)
-            border_color = (0, 255, 0)
-            
             last_focus_time = time.time()
             
             if not focused:
                 focused = True
+                session.focused()
                 # Trigger assistant to speak when returning to focus
                 if not focus_speech_done:
                     current_time = datetime.datetime.now().strftime('%I:%M:%S')
-                    speak(f"Welcome back! Focused. It is {current_time}.")
+                    announce_focus(f"Welcome back! Focused. It is {current_time}.", "welcome_back")
                     focus_speech_done = True
                 
             label = "FOCUSED"
-            label_color = (0, 255, 0)
+            label_color = FOCUSED_COLOR
             
         else:
             # UNFOCUSED
-            blurred = cv2.GaussianBlur(frame, (45, 45), 0)
-            thumbnail = cv2.resize(blurred, thumb_size)
-            border_color = (0, 0, 255) 
-            
             if focused:
                 unfocus_count += 1
                 focused = False
+                session.unfocused()
                 focus_speech_done = False # Allow assistant to speak next time user focuses
-                speak(f"Unfocused! This is lapse number {unfocus_count}.")
+                announce_focus(f"Unfocused! This is lapse number {unfocus_count}.", "lapse")
+                if recorder:
+                    recorder.trigger(f"lapse{unfocus_count}") # Encoded on a background thread
 
             unfocused_time = time.time() - last_focus_time
             
             label = f"UNFOCUSED - {int(unfocused_time)}s / {UNFOCUS_TIMEOUT}s"
-            label_color = (0, 0, 255)
+            label_color = UNFOCUSED_COLOR
             
             # --- AUTOMATIC EXIT CONDITION ---
             if unfocused_time >= UNFOCUS_TIMEOUT:
-                speak(f"Unfocused for {UNFOCUS_TIMEOUT} seconds. Exiting focus mode.")
+                speak(f"Unfocused for {UNFOCUS_TIMEOUT} seconds. Exiting focus mode.", block=False, cache=True)
                 assistant_running = False # Stop the main loop and voice thread
                 break
                 
-        # --- DISPLAY LOGIC (Same as face.py/face1.py) ---
-        thumbnail_with_border = cv2.copyMakeBorder(
-            thumbnail, 5, 5, 5, 5, cv2.BORDER_CONSTANT, value=border_color
-        )
-        cv2.putText(thumbnail_with_border, label, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, label_color, 2)
-
-        h_thumb, w_thumb, _ = thumbnail_with_border.shape
-        x_offset = frame.shape[1] - w_thumb - 10
-        y_offset = 10
-        frame[y_offset:y_offset+h_thumb, x_offset:x_offset+w_thumb] = thumbnail_with_border
+        vision.report_state(label=label, lapses=unfocus_count)
 
+        # --- DISPLAY LOGIC (Same as face.py/face1.py, paced by the render stage) ---
+        if not vision.should_render():
+            continue
+        vision.draw_overlay(frame, face_co, label, label_color)
         cv2.putText(frame, f"Unfocus Lapses: {unfocus_count}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-        cv2.imshow('AI Focus Assistant - Enhanced', frame)
 
-        if cv2.waitKey(1) == 49: # Exit on '1' key press
-            speak("Manual exit detected.")
+        if vision.show(frame): # Exit on '1' key press (or the preview server's control API)
+            speak("Manual exit detected.", block=False, cache=True)
             assistant_running = False
             break
 
     # --- CLEANUP ---
-    webcam.release()
-    cv2.destroyAllWindows()
+    vision.close()
+    session.end() # Flushes the session's events to the log
+    if recorder:
+        recorder.close() # Finishes a clip still recording
+    speech.get_worker().wait(timeout=5) # Let the exit message finish
     # Wait for the voice thread to finish its last task
     if voice_thread.is_alive():
         voice_thread.join(timeout=1)
@@ -0,0 +1,244 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+import metrics
+import phrase_cache
+
+# --- PRIORITIES (lower is spoken first) ---
+PRIORITY_HIGH = 0    # Exit / error messages and direct answers
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2     # Background alerts that may be dropped when stale
+
+PHRASE_CACHE = os.environ.get("VISION_PHRASE_CACHE", "1") == "1"  # Play fixed phrases from pre-rendered audio
+_RENDER = object()  # _next_message() marker: render a queued phrase segment while idle
+
+
+class Message:
+    """One queued utterance."""
+    __slots__ = ("text", "priority", "key", "expires_at", "done", "cancelled", "cache")
+
+    def __init__(self, text, priority, key, max_age, cache=False):
+        self.text = text
+        self.cache = cache
+        self.priority = priority
+        self.key = key
+        self.expires_at = time.monotonic() + max_age if max_age else None
+        self.done = threading.Event()
+        self.cancelled = False
+
+
+class SpeechWorker:
+    """Owns the pyttsx3 engine on a dedicated thread and speaks queued messages.
+
+    Messages sharing a `key` coalesce: a newer one replaces the queued older
+    one, so a burst of focus flaps produces a single announcement. Messages
+    past their `max_age` are dropped instead of spoken late.
+
+    Messages queued with cache=True (fixed and templated phrases) are played
+    from pre-rendered audio through pygame.mixer when every segment is
+    cached; otherwise they are spoken live and their segments are rendered
+    while the worker is idle.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._by_key = {}
+        self._cond = threading.Condition()
+        self._interrupt = threading.Event()
+        self._thread = None
+        self._running = False
+        self._speaking = False
+        self._engine = None
+        self._to_render = deque()
+        self._queued_segments = set()
+        self.cache = None
+        if PHRASE_CACHE:
+            try:
+                self.cache = phrase_cache.PhraseCache()
+            except OSError as e:
+                print(f"Phrase cache disabled: {e}")
+        self.spoken = 0
+        self.played_cached = 0
+        self.coalesced = 0
+        self.expired = 0
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+                self._thread.start()
+        return self
+
+    def say(self, text, priority=PRIORITY_NORMAL, key=None, max_age=None, cache=False):
+        """Queues text without blocking; returns the Message (wait on message.done)."""
+        self.start()
+        message = Message(text, priority, key, max_age, cache)
+        with self._cond:
+            if key is not None:
+                previous = self._by_key.get(key)
+                if previous is not None and not previous.done.is_set():
+                    previous.cancelled = True
+                    previous.done.set()
+                    self.coalesced += 1
+                self._by_key[key] = message
+            heapq.heappush(self._heap, (priority, next(self._seq), message))
+            self._cond.notify()
+        return message
+
+    def prerender(self, texts):
+        """Queues the segments of phrases to render into the cache while nothing is being said."""
+        if self.cache is None:
+            return
+        self.start()
+        with self._cond:
+            for text in texts:
+                for segment in phrase_cache.split_segments(text):
+                    if segment not in self._queued_segments:
+                        self._queued_segments.add(segment)
+                        self._to_render.append(segment)
+            self._cond.notify()
+
+    def cancel(self):
+        """Drops every queued message and cuts off the one being spoken."""
+        with self._cond:
+            for _, _, message in self._heap:
+                message.cancelled = True
+                message.done.set()
+            self._heap.clear()
+            self._by_key.clear()
+            if self._speaking:
+                self._interrupt.set()
+
+    def wait(self, timeout=None):
+        """Blocks until the queue is empty and nothing is being spoken."""
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while self._heap or self._speaking:
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def is_speaking(self):
+        return self._speaking
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    # --- WORKER THREAD ---
+    def _next_message(self):
+        with self._cond:
+            while self._running:
+                while self._heap:
+                    _, _, message = heapq.heappop(self._heap)
+                    if message.cancelled:
+                        continue
+                    if self._by_key.get(message.key) is message:
+                        del self._by_key[message.key]
+                    if message.expires_at and time.monotonic() > message.expires_at:
+                        self.expired += 1
+                        message.done.set()
+                        continue
+                    self._speaking = True
+                    self._interrupt.clear()
+                    return message
+                self._cond.notify_all()
+                if self._to_render:
+                    return _RENDER
+                self._cond.wait()
+            return None
+
+    def _run(self):
+        try:
+            import pyttsx3  # Imported here so importing this module stays cheap
+            engine = pyttsx3.init()
+            engine.connect("started-word", self._on_word)
+        except Exception as e:
+            print(f"Voice Initialization Error: {e}")
+            engine = None
+        self._engine = engine
+        while True:
+            message = self._next_message()
+            if message is None:
+                break
+            if message is _RENDER:
+                with self._cond:
+                    segment = self._to_render.popleft()
+                    self._queued_segments.discard(segment)
+                if engine:
+                    self.cache.render(engine, segment)
+                continue
+            try:
+                with metrics.timer("speak"):
+                    if message.cache and self.cache and self._play_cached(message.text):
+                        self.played_cached += 1
+                    elif engine:
+                        engine.say(message.text)
+                        engine.runAndWait()
+                        if message.cache and self.cache:
+                            self.prerender([message.text])  # Cached from the next time on
+                self.spoken += 1
+            except Exception as e:
+                print(f"Speech error: {e}")
+            finally:
+                message.done.set()
+                with self._cond:
+                    self._speaking = False
+                    self._cond.notify_all()
+
+    def _play_cached(self, text):
+        """Plays the joined cached segments; False when any segment is missing."""
+        sound = self.cache.sound(text)
+        channel = sound.play() if sound is not None else None
+        if channel is None:
+            return False
+        while channel.get_busy():
+            if self._interrupt.is_set():
+                channel.stop()
+                break
+            time.sleep(0.01)
+        return True
+
+    def _on_word(self, name, location, length):
+        if self._interrupt.is_set():
+            self._engine.stop()
+
+
+# --- SHARED WORKER ---
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_worker():
+    """Returns the process-wide speech worker (one pyttsx3 engine for all threads)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = SpeechWorker().start()
+        return _worker
+
+def is_speaking():
+    """True while the shared worker is playing an utterance (used to mute the microphone)."""
+    return _worker is not None and _worker.is_speaking()
+
+def prerender(texts):
+    """Renders fixed phrases (and number segments) into the phrase cache in idle time."""
+    get_worker().prerender(texts)
+
+def speak(text, priority=PRIORITY_NORMAL, key=None, max_age=None, block=False, cache=False):
+    """Prints and queues text; with block=True waits until it has been spoken.
+
+    cache=True marks fixed or templated phrases that may be played from the phrase cache.
+    """
+    print(f"Assistant: {text}")
+    message = get_worker().say(text, priority, key, max_age, cache)
+    if block:
+        message.done.wait()
+    return message
@@ -1,3 +1,96 @@
+import sys
+import time
+
+_START = time.perf_counter()
+
+# --- STARTUP BUDGETS ---
+MENU_BUDGET_MS = 200    # Launch to menu
+IMPORT_BUDGET_MS = 500  # Importing any single mode module
+MODE_MODULES = ["face", "face1", "smart_assistant", "voice_assistant"]
+
+def import_breakdown(module, top=8):
+    """Imports a module in a fresh interpreter with -X importtime.
+
+    Returns (total_ms, [(ms, dependency)], error) where the dependencies are
+    the module's direct imports, slowest first.
+    """
+    import subprocess
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        rows.append((int(cumulative) / 1000, depth, name.strip()))
+    error = result.stderr.strip().splitlines()[-1] if result.returncode else None
+    index = next((i for i in range(len(rows) - 1, -1, -1) if rows[i][2] == module), None)
+    if index is None:
+        return 0.0, [], error
+    total, depth, _ = rows[index]
+    # -X importtime lists a module's imports right before the module itself
+    children = []
+    for ms, child_depth, name in reversed(rows[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 2:
+            children.append((ms, name))
+    return total, sorted(children, reverse=True)[:top], error
+
+def startup_report():
+    """Prints time to menu and an import-time breakdown of every mode module."""
+    menu_ms = (time.perf_counter() - _START) * 1000
+    flag = "OK" if menu_ms <= MENU_BUDGET_MS else "OVER BUDGET"
+    print(f"Launch to menu: {menu_ms:.0f} ms (budget {MENU_BUDGET_MS} ms) {flag}")
+    for module in MODE_MODULES:
+        total, children, error = import_breakdown(module)
+        flag = "OK" if total <= IMPORT_BUDGET_MS else "OVER BUDGET"
+        if error:
+            flag = f"FAILED: {error}"
+        print(f"\nimport {module}: {total:.0f} ms (budget {IMPORT_BUDGET_MS} ms) {flag}")
+        for ms, name in children:
+            print(f"  {ms:8.1f} ms  {name}")
+    print("\nTime to first frame is printed by each vision mode when it starts.")
+
+# --- HEADLESS SERVICE ---
+HEADLESS_MODES = {
+    "face": ("face", "run_face_detection"),
+    "focus": ("face1", "get_face_unfocus_count"),
+    "smart": ("smart_assistant", "run_smart_assistant"),
+}
+
+def run_headless(mode):
+    """Runs vision modes without a window; switch or stop them through the preview server.
+
+        curl -X POST "http://127.0.0.1:8765/control?action=mode&mode=smart"
+        curl -X POST "http://127.0.0.1:8765/control?action=exit"
+    """
+    import os
+    os.environ["VISION_HEADLESS"] = "1"  # Read by vision_engine at import
+    import importlib
+    import preview_server
+    server = preview_server.get_server()
+    server.accepts_modes = True
+    while True:
+        if mode not in HEADLESS_MODES:
+            print(f"Unknown mode '{mode}'. Choose from: {', '.join(HEADLESS_MODES)}")
+        else:
+            module_name, function = HEADLESS_MODES[mode]
+            print(f"Headless: running '{mode}'")
+            getattr(importlib.import_module(module_name), function)()
+        command, server.requested = server.requested, None
+        if command is None:
+            print("Headless: idle, waiting for a control command")
+            command = server.wait_command()
+        action, mode = command
+        if action == "exit":
+            break
+    if "camera" in sys.modules:
+        sys.modules["camera"].manager.shutdown()
+    server.stop()
+    print("Exiting the program.")
+
 def menu():
     print("1. Run Simple Face Detection (face.py)")
     print("2. Run AI Focus Assistant (smart_assistant.py)")
@@ -5,6 +98,20 @@ def menu():
     print("4. Run Simple Face Detection with counts (face_count.py)")
     print("5. Exit")
 
+if "--startup-report" in sys.argv:
+    startup_report()
+    sys.exit()
+
+if "--serve" in sys.argv:
+    import command_server  # Text commands from local tools instead of the microphone
+    command_server.main(["serve"] + sys.argv[sys.argv.index("--serve") + 1:])
+    sys.exit()
+
+if "--headless" in sys.argv:
+    args = sys.argv[sys.argv.index("--headless") + 1:]
+    run_headless(args[0] if args else "focus")
+    sys.exit()
+
 while True:
     menu()
     choice = input("Select an option: ")
@@ -21,6 +128,8 @@ while True:
         import face1
         face1.get_face_unfocus_count()
     elif choice == '5':
+        if "camera" in sys.modules:
+            sys.modules["camera"].manager.shutdown()
         print("Exiting the program.")
         break
     else :
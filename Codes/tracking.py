@@ -0,0 +1,105 @@
+import cv2
+
+# --- CONFIGURATION ---
+DETECT_EVERY_N = 5      # Run the detector every N frames (1 = full-frame detection on every frame)
+ROI_PADDING = 0.5       # Search window around the last face, as a fraction of the face size
+TRACK_MIN_SCORE = 0.6   # Template-match score below which the track counts as lost
+
+
+def _clip_window(box, padding, shape):
+    """Pads an (x, y, w, h) box and clips it to the image; returns (x0, y0, x1, y1)."""
+    x, y, w, h = box
+    pad_w, pad_h = int(w * padding), int(h * padding)
+    return (max(0, x - pad_w), max(0, y - pad_h),
+            min(shape[1], x + w + pad_w), min(shape[0], y + h + pad_h))
+
+
+class FaceTracker:
+    """Follows one face between detections so the detector runs only every N frames.
+
+    Between detections the last face patch is template-matched inside a padded
+    ROI. Every N frames, or when the match score drops, the detector is re-run
+    on that ROI only, falling back to a full-frame scan when the face is lost.
+    """
+
+    def __init__(self, detector, detect_every_n=DETECT_EVERY_N, roi_padding=ROI_PADDING,
+                 min_score=TRACK_MIN_SCORE):
+        self.detector = detector
+        self.detect_every_n = detect_every_n
+        self.roi_padding = roi_padding
+        self.min_score = min_score
+        self.box = None
+        self.template = None
+        self.frames_since_detect = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+        self.tracked_frames = 0
+
+    def reset(self):
+        self.box = None
+        self.template = None
+        self.frames_since_detect = 0
+
+    def update(self, image):
+        """Returns the face boxes for this detection image, like detectMultiScale."""
+        if self.detect_every_n <= 1:
+            self.full_detections += 1
+            return self._detect(image)
+
+        if self.box is not None:
+            self.frames_since_detect += 1
+            if self.frames_since_detect < self.detect_every_n and self._track(image):
+                self.tracked_frames += 1
+                return [self.box]
+            # Scheduled re-detection or low confidence: search around the last box first
+            self.roi_detections += 1
+            if self._detect_in_roi(image):
+                return [self.box]
+
+        self.full_detections += 1
+        faces = self._detect(image)
+        if len(faces) == 0:
+            self.reset()
+            return []
+        self._lock_on(image, self._largest(faces))
+        return [self.box]
+
+    # --- DETECTION ---
+    def _detect(self, image):
+        return self.detector.detect(image)
+
+    def _detect_in_roi(self, image):
+        x0, y0, x1, y1 = _clip_window(self.box, self.roi_padding, image.shape)
+        faces = self._detect(image[y0:y1, x0:x1])
+        if len(faces) == 0:
+            return False
+        x, y, w, h = self._largest(faces)
+        self._lock_on(image, (x + x0, y + y0, w, h))
+        return True
+
+    # --- TRACKING ---
+    def _track(self, image):
+        x0, y0, x1, y1 = _clip_window(self.box, self.roi_padding, image.shape)
+        th, tw = self.template.shape[:2]
+        if x1 - x0 < tw or y1 - y0 < th:
+            return False
+        scores = cv2.matchTemplate(image[y0:y1, x0:x1], self.template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (bx, by) = cv2.minMaxLoc(scores)
+        if best < self.min_score:
+            return False
+        self.box = (x0 + bx, y0 + by, tw, th)
+        return True
+
+    def _lock_on(self, image, box):
+        x, y, w, h = (int(v) for v in box)
+        self.box = (x, y, w, h)
+        self.template = image[y:y+h, x:x+w].copy()
+        self.frames_since_detect = 0
+
+    @staticmethod
+    def _largest(faces):
+        return max(faces, key=lambda f: f[2] * f[3])
+
+    def stats(self):
+        return {"full_detections": self.full_detections, "roi_detections": self.roi_detections,
+                "tracked_frames": self.tracked_frames}
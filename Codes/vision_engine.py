@@ -0,0 +1,276 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+import camera
+import metrics
+from frame_pipeline import FocusPipeline
+from tracking import FaceTracker
+from focus_state import FocusStateMachine, DetectionScheduler
+from detectors import make_detector
+
+# --- CONFIGURATION ---
+VISION_DETECTOR = os.environ.get("VISION_DETECTOR", "haar")  # haar | lbp | dnn
+CAMERA_INDEX = 0
+THUMB_SIZE = (300, 300)
+EXIT_KEY = 49  # '1'
+ADAPTIVE_DETECTION = os.environ.get("VISION_ADAPTIVE", "1") == "1"  # Detection rate follows focus stability
+DETECT_WORKERS = int(os.environ.get("VISION_DETECT_WORKERS", "1"))  # >1: parallel in-order detection, no tracking
+HEADLESS = os.environ.get("VISION_HEADLESS") == "1"  # No window: preview and control via preview_server.py
+PREVIEW = HEADLESS or os.environ.get("VISION_PREVIEW") == "1"
+
+FOCUSED_COLOR = (0, 255, 0)
+UNFOCUSED_COLOR = (0, 0, 255)
+BORDER = 5
+BLUR_KERNEL = 45        # Blur strength at a 640-pixel-wide frame, scaled down to the thumbnail
+LABEL_CACHE_SIZE = 64
+
+
+class OverlayRenderer:
+    """Draws the focus thumbnail without per-frame allocations.
+
+    The thumbnail and bordered buffers are allocated once, the unfocused blur
+    runs on the already-downsized thumbnail, and each label is rasterized
+    once into a cached mask that is blitted with np.copyto.
+    """
+
+    def __init__(self, thumb_size=THUMB_SIZE, border=BORDER):
+        w, h = thumb_size
+        self.thumb_size = thumb_size
+        self.border = border
+        self._thumb = np.empty((h, w, 3), np.uint8)
+        self._bordered = np.empty((h + 2 * border, w + 2 * border, 3), np.uint8)
+        self._border_color = None
+        self._color = None
+        self._labels = OrderedDict()
+
+    def _label_mask(self, label):
+        mask = self._labels.get(label)
+        if mask is None:
+            canvas = np.zeros(self._bordered.shape[:2], np.uint8)
+            cv2.putText(canvas, label, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 255, 2)
+            mask = self._labels[label] = (canvas[:40] > 0)[:, :, None]
+            if len(self._labels) > LABEL_CACHE_SIZE:
+                self._labels.popitem(last=False)
+        else:
+            self._labels.move_to_end(label)
+        return mask
+
+    def draw(self, frame, faces, label, color):
+        thumb = self._thumb
+        if len(faces) > 0:
+            (x, y, w, h) = faces[0]
+            cv2.resize(frame[y:y+h, x:x+w], self.thumb_size, dst=thumb)
+        else:
+            # Downsize first, then blur the small image with an equivalently scaled kernel
+            cv2.resize(frame, self.thumb_size, dst=thumb, interpolation=cv2.INTER_AREA)
+            k = max(3, int(BLUR_KERNEL * self.thumb_size[0] / 640) | 1)
+            cv2.GaussianBlur(thumb, (k, k), 0, dst=thumb)
+
+        bordered = self._bordered
+        if color != self._border_color:
+            bordered[:] = color
+            self._border_color = color
+            self._color = np.array(color, np.uint8)
+        b = self.border
+        bordered[b:-b, b:-b] = thumb
+        mask = self._label_mask(label)
+        np.copyto(bordered[:mask.shape[0]], self._color, where=mask)
+
+        h_thumb, w_thumb = bordered.shape[:2]
+        x_offset = frame.shape[1] - w_thumb - 10
+        y_offset = 10
+        frame[y_offset:y_offset+h_thumb, x_offset:x_offset+w_thumb] = bordered
+
+
+class VisionEngine:
+    """Camera, detector, tracker and overlay shared by every vision mode.
+
+    Modes keep their own focus logic and drive the engine like this:
+
+        for packet in engine.frames():
+            ...react to packet.focused (debounced) and draw packet.faces...
+            if engine.should_render():
+                engine.draw_overlay(packet.frame, packet.faces, label, color)
+                if engine.show(packet.frame):
+                    break
+        engine.close()
+
+    Headless engines never open a window: rendered frames go to the local
+    preview server (only while a client is watching) and exit / mode changes
+    arrive through its control API instead of the '1' key.
+    """
+
+    def __init__(self, window_name, detector=VISION_DETECTOR, source=CAMERA_INDEX, tracking=True,
+                 headless=HEADLESS, preview=PREVIEW, workers=DETECT_WORKERS):
+        # Nothing heavy happens here: the detector and camera are created on first use
+        self.window_name = window_name
+        self.detector_spec = detector
+        self.tracking = tracking
+        # A camera index (shared through camera.py), a video file path, or any object with read()/release()
+        self.source = source
+        self.webcam = None
+        self.pipeline = None
+        self.first_frame_s = None
+        self._detector = None
+        self._tracker = None
+        self.focus = FocusStateMachine()
+        self.scheduler = None
+        self.last_detect_seconds = None  # (convert, detect) of the latest detect() call; None when skipped
+        self.workers = workers
+        self._local = threading.local()
+        self.renderer = OverlayRenderer()
+        self.headless = headless
+        self.preview = preview
+        self.server = None
+        self.state = {"mode": window_name}
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            spec = self.detector_spec
+            self._detector = make_detector(spec) if isinstance(spec, str) else spec
+        return self._detector
+
+    @property
+    def tracker(self):
+        if self._tracker is None:
+            self._tracker = FaceTracker(self.detector)
+            if not self.tracking:
+                self._tracker.detect_every_n = 1
+        return self._tracker
+
+    def open(self):
+        """Opens the frame source (and loads the detector) if not already open."""
+        if self.webcam is None:
+            self.tracker  # Loads the detector before the camera starts streaming
+            source = self.source
+            if isinstance(source, int):
+                self.webcam = camera.acquire(source)
+            elif isinstance(source, str):
+                self.webcam = cv2.VideoCapture(source)
+            else:
+                self.webcam = source
+        return self
+
+    def is_ready(self):
+        self.open()
+        return self.webcam is not None and (not hasattr(self.webcam, "isOpened") or self.webcam.isOpened())
+
+    # --- DETECTION (runs on the pipeline's detection thread) ---
+    def detect(self, frame):
+        tracker, scheduler = self.tracker, self.scheduler
+        if scheduler and tracker.box is None and not scheduler.due():
+            scheduler.observe(0.0, False)  # Nothing to track and no scan due: reuse "no face"
+            self.last_detect_seconds = None
+            return ()
+        started = time.perf_counter()
+        image, scale = self.detector.prepare(frame)
+        prepared = time.perf_counter()
+        runs = tracker.full_detections + tracker.roi_detections
+        faces = tracker.update(image)
+        finished = time.perf_counter()
+        metrics.observe("convert", prepared - started)
+        metrics.observe("detect", finished - prepared)
+        self.last_detect_seconds = (prepared - started, finished - prepared)  # Read by benchmark.py
+        if scheduler:
+            scheduler.observe(finished - started, tracker.full_detections + tracker.roi_detections != runs)
+        return self.detector.to_frame(faces, scale)
+
+    def detect_independent(self, frame):
+        """Full-frame detection with this thread's own detector (parallel mode, no tracking)."""
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            # Detectors keep per-instance scratch buffers, so every pool thread needs its own
+            spec = self.detector_spec
+            detector = self._local.detector = make_detector(spec if isinstance(spec, str) else spec.name)
+        started = time.perf_counter()
+        image, scale = detector.prepare(frame)
+        prepared = time.perf_counter()
+        faces = detector.detect(image)
+        metrics.observe("convert", prepared - started)
+        metrics.observe("detect", time.perf_counter() - prepared)
+        return detector.to_frame(faces, scale)
+
+    def frames(self):
+        """Yields detected FramePackets until the camera stops or the loop breaks."""
+        started = time.perf_counter()
+        metrics.start()
+        if not self.is_ready():
+            print("Error: Could not open the camera.")
+            return
+        if self.preview and self.server is None:
+            import preview_server
+            self.server = preview_server.get_server()
+        self.focus = FocusStateMachine()
+        if self.workers > 1:
+            # Frames are detected independently, then reassembled in order before the state machine
+            self.pipeline = FocusPipeline(self.webcam, self.detect_independent, workers=self.workers).start()
+        else:
+            if ADAPTIVE_DETECTION and self.tracking:
+                self.scheduler = DetectionScheduler(self.focus, self.tracker)
+            self.pipeline = FocusPipeline(self.webcam, self.detect).start()
+        for packet in self.pipeline.results():
+            packet.focused = self.focus.update(len(packet.faces) > 0)
+            if self.first_frame_s is None:
+                self.first_frame_s = time.perf_counter() - started
+                print(f"First frame after {self.first_frame_s * 1000:.0f} ms")
+            if self.server:
+                self.state.update(frame=packet.index, faces=len(packet.faces), focused=packet.focused)
+                self.server.publish_state(self.state)
+            yield packet
+
+    def report_state(self, **fields):
+        """Adds mode-specific fields (label, lapse count...) to the state served at /state."""
+        if self.server:
+            self.state.update(fields)
+
+    def should_render(self):
+        if self.headless:
+            if self.server is None:
+                return False  # Headless without the preview server: nothing to draw for
+            # Render only for a connected preview client, but let pending control commands reach show()
+            return self.server.has_command() or (self.server.wants_frame() and self.pipeline.should_render())
+        return self.pipeline.should_render()
+
+    # --- RENDERING ---
+    def draw_overlay(self, frame, faces, label, color):
+        """Draws the face (or blurred frame) thumbnail with a colored border and label."""
+        with metrics.timer("render"):
+            self.renderer.draw(frame, faces, label, color)
+
+    def show(self, frame):
+        """Displays or streams the frame; returns True on the exit key or an exit/mode command."""
+        exit_requested = False
+        if self.server:
+            self.server.publish_frame(frame)
+            command = self.server.poll_command()
+            if command:
+                self.server.requested = command
+                exit_requested = True
+        if not self.headless:
+            with metrics.timer("imshow"):
+                cv2.imshow(self.window_name, frame)
+                exit_requested = cv2.waitKey(1) == EXIT_KEY or exit_requested
+        return exit_requested
+
+    # --- CLEANUP ---
+    def stop(self):
+        if self.pipeline:
+            self.pipeline.stop()
+            print(self.pipeline.format_stats())
+            if self.workers <= 1:
+                print(f"Tracker: {self.tracker.stats()}")
+            if self.scheduler:
+                print(f"Scheduler: {self.scheduler.stats()}, focus transitions: {self.focus.transitions}")
+            self.pipeline = None
+
+    def close(self):
+        self.stop()
+        if self.webcam is not None:
+            self.webcam.release() # Shared cameras go back to the manager and stay warm
+            self.webcam = None
+        if not self.headless:
+            cv2.destroyAllWindows()
@@ -1,24 +1,23 @@
 import speech_recognition as sr
-import pygame
 import datetime
 import webbrowser
 import random
-import pyttsx3
-import wikipedia
 import pyjokes
-import requests
+import http_client
 import os
-
-# --- SAFE IMPORT FOR PYWHATKIT (SKIPS INTERNET CHECK IF OFFLINE) ---
-try:
-    import pywhatkit as kit
-except Exception:
-    kit = None
-    print("⚠️ pywhatkit disabled (no internet connection).")
+import speech
+import audio_input
+import recognizers
+import intents
+import wiki_cache
+import session_log
+import metrics
+import music_library
+from dispatcher import Dispatcher, Reply, HANDLER_TIMEOUT
 
 # --- CONFIGURATION (Uses API Key as requested) ---
 OPENWEATHERMAP_API_KEY = " YOUR OPENWEATHERMAP KEY "
-MUSIC_DIR = "C:/projects/Vision/music"  # change path to your music folder
+MUSIC_DIR = os.environ.get("VISION_MUSIC_DIR", "C:/projects/Vision/music")  # change path to your music folder
 
 # --- DATA ---
 FUN_FACTS = [
@@ -37,92 +36,103 @@ QUOTES = [
     "Do something today that your future self will thank you for."
 ]
 
-# --- INITIALIZATION ---
-try:
-    engine = pyttsx3.init()
-    wikipedia.set_lang("en")
-    pygame.mixer.init()
-except Exception as e:
-    print(f"Initialization error: {e}")
-    exit()
+MUSIC_NOT_PLAYING = "Nothing is playing right now."
+MUSIC_HELP = "I can pause, resume, or turn the volume up or down."
+
+# Rendered into the phrase cache in idle time (numbers cover clock times and volume levels)
+CACHED_PHRASES = FUN_FACTS + QUOTES + [
+    f"{greeting} I am your assistant. How can I help you today?"
+    for greeting in ("Good Morning!", "Good Afternoon!", "Good Evening!")
+] + ["The time is", "AM", "PM", "Volume set to", "percent",
+    MUSIC_NOT_PLAYING, MUSIC_HELP] + [str(n) for n in range(0, 101)] + [
+    f"oh {n}" for n in range(10)]
+
+# --- LAZY INITIALIZATION (heavy resources load on first use, not on import) ---
+_kit = None
+_kit_loaded = False
+_mixer = None
+_recognizer = None
+
+def get_kit():
+    """Imports pywhatkit on first use; its import performs an internet check."""
+    global _kit, _kit_loaded
+    if not _kit_loaded:
+        _kit_loaded = True
+        try:
+            import pywhatkit
+            _kit = pywhatkit
+        except Exception:
+            print("⚠️ pywhatkit disabled (no internet connection).")
+    return _kit
+
+def get_mixer():
+    """Initializes pygame.mixer on first use."""
+    global _mixer
+    if _mixer is None:
+        import pygame
+        pygame.mixer.init()
+        _mixer = pygame.mixer
+    return _mixer
+
+def get_recognizer():
+    """Builds the recognizer on first use (set VOICE_RECOGNIZER=vosk/sphinx to work offline)."""
+    global _recognizer
+    if _recognizer is None:
+        _recognizer = recognizers.get_recognizer()
+    return _recognizer
 
 # --- CORE FUNCTIONS ---
-def speak(text):
-    """Converts text to speech."""
-    print(f"Assistant: {text}")
-    engine.say(text)
-    engine.runAndWait()
+def speak(text, block=True, cache=False):
+    """Converts text to speech (waits by default so the microphone doesn't hear the reply).
+
+    cache=True marks fixed or templated phrases that can play from the phrase cache.
+    """
+    speech.speak(text, priority=speech.PRIORITY_HIGH, block=block, cache=cache)
 
 def take_command():
-    """Listens for a command and returns it as text."""
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening...")
-        r.pause_threshold = 1
-        r.adjust_for_ambient_noise(source)
-        audio = r.listen(source)
+    """Takes the next utterance from the always-open microphone stream and returns it as text."""
+    print("Listening...")
+    with metrics.timer("listen"):
+        audio = audio_input.get_stream(suppress=speech.is_speaking).get()
     try:
         print("Recognizing...")
-        query = r.recognize_google(audio, language='en-in')
+        with metrics.timer("recognize"):
+            query = get_recognizer().recognize(audio)
+        if query is None:
+            return "none" # Not addressed to the assistant
         print(f"You said: {query}")
         return query.lower()
     except sr.UnknownValueError:
-        speak("Sorry, I didn't catch that. Could you please repeat?")
+        speak("Sorry, I didn't catch that. Could you please repeat?", cache=True)
         return "none"
     except sr.RequestError:
-        speak("Could not request results from the speech service.")
+        speak("Could not request results from the speech service.", cache=True)
         return "none"
     except Exception as e:
-        speak("An unexpected error occurred while capturing your command.")
+        speak("An unexpected error occurred while capturing your command.", cache=True)
         print(f"Error: {e}")
         return "none"
 
-# --- NLP Intent Classification (Simplified) ---
+# --- NLP Intent Classification (shared compiled engine, see intents.py) ---
 def classify_intent(query):
-    """Classifies the user's intent based on keywords."""
-    if 'exit' in query or 'stop' in query or 'bye' in query:
-        return 'exit'
-    if 'time' in query:
-        return 'get_time'
-    if 'joke' in query:
-        return 'tell_joke'
-    if 'fun fact' in query:
-        return 'tell_fact'
-    if 'quote' in query:
-        return 'tell_quote'
-    if 'wikipedia' in query or 'wiki' in query:
-        return 'search_wikipedia'
-    if 'youtube' in query or 'play' in query and ('song' in query or 'video' in query):
-        return 'play_youtube'
-    if 'search' in query or 'google' in query or 'look up' in query:
-        return 'search_google'
-    if 'weather' in query:
-        return 'get_weather'
-    if 'pause' in query or 'resume' in query or 'volume' in query:
-        return 'control_music'
-    if 'switch to face detection' in query or 'face detection' in query:
-        return 'switch_to_vision'
-    return 'unknown'
+    """Classifies the user's intent; returns the best IntentMatch (intent, score, slots)."""
+    return intents.classify(query)
 
 # --- WEATHER ---
 def get_weather(city):
-    
-    """Fetches and speaks the weather for a given city using API Key."""
+    """Fetches the weather for a given city using API Key; returns the reply to speak."""
     if not OPENWEATHERMAP_API_KEY:
-        speak("Weather check failed. Please set your OpenWeatherMap API key.")
-        return
+        return Reply("Weather check failed. Please set your OpenWeatherMap API key.", True)
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={OPENWEATHERMAP_API_KEY}&units=metric"
-        response = requests.get(url)
-        data = response.json()
-        if data["cod"] == 200:
+        # Pooled, timeout-bounded and cached per city (see http_client.py)
+        data = http_client.get_weather_client(OPENWEATHERMAP_API_KEY).lookup(city)
+        if str(data.get("cod")) == "200":
             temp = data["main"]["temp"]
             desc = data["weather"][0]["description"]
-            speak(f"The temperature in {city} is {temp}°C with {desc}.")
-        else:
-            speak(f"I couldn't find weather information for {city}.")
+            return Reply(f"The temperature in {city} is {temp}°C with {desc}.")
+        return Reply(f"I couldn't find weather information for {city}.")
     except Exception as e:
-        speak("Sorry, I could not fetch weather data right now.")
+        return Reply("Sorry, I could not fetch weather data right now.", True)
 
 # --- GREETING ---
 def wish_user():
@@ -133,109 +143,177 @@ def wish_user():
         greeting = "Good Afternoon!"
     else:
         greeting = "Good Evening!"
-    speak(f"{greeting} I am your assistant. How can I help you today?")
+    speak(f"{greeting} I am your assistant. How can I help you today?", cache=True)
+
+# --- INTENT HANDLERS (run on the dispatcher's thread pool; each returns the reply) ---
+_music = {"playing": False, "volume": 0.5}
+_player = None
+LIBRARY_ANY = {"music", "my music", "songs", "my songs", "something"}  # "play some music" picks the first track
+
+def play_local(song):
+    """Plays the best library match for a spoken title/artist; returns the track or None."""
+    global _player
+    library = music_library.get_library(MUSIC_DIR)
+    if music_library.normalize(song) in LIBRARY_ANY:
+        track = library.tracks[0] if library.tracks else None
+    else:
+        track = library.best_match(song)
+    if track is None:
+        return None
+    if _player is None:
+        _player = music_library.Player(get_mixer(), library)
+    _player.play(track)
+    _music["playing"] = True
+    return track
+
+def handle_time(match, query):
+    return Reply(f"The time is {datetime.datetime.now().strftime('%I:%M %p')}", True)
+
+def handle_joke(match, query):
+    return Reply(pyjokes.get_joke())
+
+def handle_fact(match, query):
+    return Reply(random.choice(FUN_FACTS), True)
+
+def handle_quote(match, query):
+    return Reply(random.choice(QUOTES), True)
+
+def handle_wikipedia(match, query):
+    search_term = match.slots.get('term', query)
+    try:
+        return Reply(wiki_cache.summary(search_term, sentences=random.randint(2, 4)))
+    except Exception:
+        return Reply("Sorry, I couldn’t find information on that.", True)
+
+def handle_youtube(match, query):
+    search_term = match.slots['song']
+    if 'youtube' not in query:
+        track = play_local(search_term)
+        if track is not None:
+            by = f" by {track['artist']}" if track['artist'] else ""
+            return Reply(f"Playing {track['title']}{by}.")
+    kit = get_kit()
+    if kit is None:
+        return Reply("You are offline. Cannot access YouTube.", True)
+    kit.playonyt(search_term)
+    return Reply(f"Playing {search_term} on YouTube.")
+
+def handle_google(match, query):
+    search_term = match.slots['term']
+    webbrowser.open(f"https://www.google.com/search?q={search_term}")
+    return Reply(f"Searching Google for {search_term}")
+
+def handle_weather(match, query):
+    city = match.slots['city']
+    if city == 'here':
+        city = 'Angallu'  # Placeholder for location-based weather fetching
+    if city:
+        return get_weather(city)
+    return Reply("Please tell me the city name.", True)
+
+def handle_music(match, query):
+    mixer = get_mixer()
+    action = match.slots.get('action')
+    if action == 'pause' and _music["playing"]:
+        mixer.music.pause()
+        return Reply("Music paused.", True)
+    elif action == 'resume' and _music["playing"]:
+        mixer.music.unpause()
+        return Reply("Resuming music.", True)
+    elif action in ('volume up', 'volume down'):
+        step = 0.1 if action == 'volume up' else -0.1
+        _music["volume"] = min(1.0, max(0.0, _music["volume"] + step))
+        mixer.music.set_volume(_music["volume"])
+        return Reply(f"Volume set to {int(_music['volume'] * 100)} percent.", True)
+    elif action in ('pause', 'resume'):
+        return Reply(MUSIC_NOT_PLAYING, True)
+    return Reply(MUSIC_HELP, True)
+
+def handle_unknown(match, query):
+    return Reply("I'm sorry, I don't know how to handle that command yet.", True)
+
+HANDLERS = {
+    'get_time': handle_time,
+    'tell_joke': handle_joke,
+    'tell_fact': handle_fact,
+    'tell_quote': handle_quote,
+    'search_wikipedia': handle_wikipedia,
+    'play_youtube': handle_youtube,
+    'search_google': handle_google,
+    'get_weather': handle_weather,
+    'control_music': handle_music,
+    'unknown': handle_unknown,
+}
+# Spoken as soon as a slow command is heard, before its answer is ready
+ACKNOWLEDGEMENTS = {'search_wikipedia': 'Searching Wikipedia...'}
+
+def execute(match, query):
+    """Runs the handler for a classified query and returns its Reply (or None)."""
+    return HANDLERS.get(match.intent, handle_wikipedia)(match, query)
 
 # --- MAIN LOGIC ---
 def run_assistant():
+    try:
+        mixer = get_mixer()
+    except Exception as e:
+        print(f"Initialization error: {e}")
+        return
+    metrics.start()
     wish_user()
-    is_music_playing = False
-    volume = 0.5
-    pygame.mixer.music.set_volume(volume)
+    speech.prerender(CACHED_PHRASES)
+    session = session_log.start_session()
+    mixer.music.set_volume(_music["volume"])
+    music_library.get_library(MUSIC_DIR)  # Loads the cached index; the rescan runs in the background
+    # Handlers run concurrently and answer in order, so the assistant keeps listening
+    dispatcher = Dispatcher(on_done=session.intent) # Logs each intent with its handler time
+    youtube_follow_up = False
 
     while True:
         query = take_command()
         if query == "none":
             continue
 
-        intent = classify_intent(query)
-        
-        # --- Execute Intent ---
-        if intent == 'get_time':
-            speak(f"The time is {datetime.datetime.now().strftime('%I:%M %p')}")
+        if youtube_follow_up:
+            # Answer to "What should I play on YouTube?"
+            youtube_follow_up = False
+            dispatcher.submit('play_youtube', handle_youtube, intents.IntentMatch('play_youtube', 1, {'song': query}), query)
+            continue
 
-        elif intent == 'tell_joke':
-            speak(pyjokes.get_joke())
+        match = classify_intent(query)
+        intent = match.intent
+        if intent in ('cancel', 'exit', 'switch_to_vision'):
+            session.intent(intent) # Dispatched intents are logged when their handler finishes
 
-        elif intent == 'tell_fact':
-            speak(random.choice(FUN_FACTS))
-            
-        elif intent == 'tell_quote':
-            speak(random.choice(QUOTES))
+        # --- Control intents run here, everything else goes to the dispatcher ---
+        if intent == 'cancel' or (intent == 'exit' and query.strip() == 'stop' and dispatcher.busy()):
+            dispatcher.cancel() # Barge-in: drop pending answers and cut off speech
+            continue
 
-        elif intent == 'search_wikipedia':
-            speak('Searching Wikipedia...')
-            search_term = query.replace("wikipedia", "").replace("wiki", "").strip()
-            try:
-                summary = wikipedia.summary(search_term, sentences=random.randint(2, 4))
-                speak(summary)
-            except Exception:
-                speak("Sorry, I couldn’t find information on that.")
-
-        elif intent == 'play_youtube':
-            if kit is None:
-                speak("You are offline. Cannot access YouTube.")
-                continue
-            search_term = query.replace('youtube', '').replace('play', '').strip()
-            if not search_term:
-                speak("What should I play on YouTube?")
-                search_term = take_command()
-            if search_term != "none":
-                speak(f"Playing {search_term} on YouTube.")
-                kit.playonyt(search_term)
-
-        elif intent == 'search_google':
-            search_term = query.replace("search", "").replace("google", "").replace("look up", "").strip()
-            speak(f"Searching Google for {search_term}")
-            webbrowser.open(f"https://www.google.com/search?q={search_term}")
-
-        elif intent == 'get_weather':
-            city = query.replace("weather in", "").replace("what's the weather in", "").strip()
-            if city in ['near me', 'my location', 'here']:
-                city = 'Angallu'  # Placeholder for location-based weather fetching
-            if city:
-                get_weather(city)
-            else:
-                speak("Please tell me the city name.")
+        elif intent == 'exit':
+            dispatcher.cancel() # Cut off anything still queued
+            speak("Goodbye! Have a great day.", cache=True)
+            session.end()
+            break
 
         elif intent == 'switch_to_vision':
-            speak("Switching to Face Detection Mode.")
+            dispatcher.wait_idle(timeout=HANDLER_TIMEOUT)
+            speak("Switching to Face Detection Mode.", cache=True)
             try:
                 import face
                 face.run_face_detection()
             except Exception:
-                speak("Face detection module not found.")
-
-        elif intent == 'control_music':
-            if 'pause' in query and is_music_playing:
-                pygame.mixer.music.pause()
-                speak("Music paused.")
-            elif 'resume' in query and is_music_playing:
-                pygame.mixer.music.unpause()
-                speak("Resuming music.")
-            elif 'volume up' in query:
-                volume = min(1.0, volume + 0.1)
-                pygame.mixer.music.set_volume(volume)
-                speak(f"Volume set to {int(volume * 100)} percent.")
-            elif 'volume down' in query:
-                volume = max(0.0, volume - 0.1)
-                pygame.mixer.music.set_volume(volume)
-                speak(f"Volume set to {int(volume * 100)} percent.")
+                speak("Face detection module not found.", cache=True)
+
+        elif intent == 'play_youtube' and not match.slots['song']:
+            speak("What should I play on YouTube?", cache=True)
+            youtube_follow_up = True
 
-        elif intent == 'exit':
-            speak("Goodbye! Have a great day.")
-            break
-            
-        elif intent == 'unknown':
-            speak("I'm sorry, I don't know how to handle that command yet.")
-        
         else:
-            speak('Searching Online...')
-            search_term = query.replace("wikipedia", "").replace("wiki", "").strip()
-            try:
-                summary = wikipedia.summary(search_term, sentences=random.randint(2, 4))
-                speak(summary)
-            except Exception:
-                speak("Sorry, I couldn’t find information on that.")
+            if intent in ACKNOWLEDGEMENTS:
+                speak(ACKNOWLEDGEMENTS[intent], block=False, cache=True)
+            dispatcher.submit(intent, execute, match, query)
+
+    dispatcher.shutdown()
 
 # --- RUN DIRECTLY ---
 if __name__ == "__main__":
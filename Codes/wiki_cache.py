@@ -0,0 +1,170 @@
+"""Persistent LRU cache of Wikipedia article leads.
+
+    python wiki_cache.py warm "Albert Einstein" "Black hole"
+    python wiki_cache.py warm --file topics.txt
+    python wiki_cache.py stats
+"""
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# --- CONFIGURATION ---
+WIKI_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".visionvoice", "wikipedia.sqlite3")
+WIKI_CACHE_MAX_ENTRIES = 2000
+WIKI_CACHE_TTL = 30 * 24 * 3600  # Refetch leads older than this when online
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+def first_sentences(text, count):
+    """Returns the first `count` sentences of a lead."""
+    return " ".join(_SENTENCE_END.split(text.strip())[:count])
+
+
+class WikiCache:
+    """SQLite store of full article leads keyed by normalized query, with TTL and LRU eviction."""
+
+    def __init__(self, path=WIKI_CACHE_FILE, max_entries=WIKI_CACHE_MAX_ENTRIES, ttl=WIKI_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY, lead TEXT NOT NULL, fetched_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_used_at ON summaries (used_at)")
+        self._db.commit()
+
+    def get(self, query, allow_stale=False):
+        """Returns the cached lead, or None when missing (or expired unless allow_stale)."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT lead, fetched_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            lead, fetched_at = row
+            if not allow_stale and now - fetched_at > self.ttl:
+                return None
+            self._db.execute("UPDATE summaries SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return lead
+
+    def put(self, query, lead):
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, lead, fetched_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, lead, now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY used_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self):
+        with self._lock:
+            count, oldest = self._db.execute("SELECT COUNT(*), MIN(fetched_at) FROM summaries").fetchone()
+        return {"entries": count, "max_entries": self.max_entries, "oldest_age_s": round(time.time() - oldest) if oldest else None}
+
+
+# --- LOOKUP ---
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = WikiCache()
+        return _cache
+
+_wikipedia = None
+
+def _get_wikipedia():
+    """Imports and configures the wikipedia package on first use."""
+    global _wikipedia
+    if _wikipedia is None:
+        import wikipedia
+        wikipedia.set_lang("en")
+        _wikipedia = wikipedia
+    return _wikipedia
+
+def fetch_lead(query):
+    """Fetches the full lead section (sentences=0) so any sentence count can be served later."""
+    return _get_wikipedia().summary(query, sentences=0)
+
+def summary(query, sentences=2):
+    """Drop-in for wikipedia.summary(): cached lead, live fetch on miss, stale lead when offline."""
+    cache = get_cache()
+    lead = cache.get(query)
+    if lead is None:
+        errors = _get_wikipedia().exceptions
+        try:
+            lead = fetch_lead(query)
+        except (errors.DisambiguationError, errors.PageError):
+            raise  # Nothing worth serving stale
+        except Exception:  # Timeouts (HTTPTimeoutError included) and connection errors
+            lead = cache.get(query, allow_stale=True)
+            if lead is None:
+                raise
+        else:
+            cache.put(query, lead)
+    return first_sentences(lead, sentences)
+
+def warm(topics):
+    """Pre-populates the cache; returns (cached, failed) topic lists."""
+    cache = get_cache()
+    cached, failed = [], []
+    for topic in topics:
+        if cache.get(topic) is not None:
+            cached.append(topic)
+            continue
+        try:
+            cache.put(topic, fetch_lead(topic))
+            cached.append(topic)
+        except Exception as e:
+            print(f"Could not fetch '{topic}': {e}")
+            failed.append(topic)
+    return cached, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wikipedia summary cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm_cmd = sub.add_parser("warm", help="Pre-populate the cache with a topic list")
+    warm_cmd.add_argument("topics", nargs="*")
+    warm_cmd.add_argument("--file", help="Text file with one topic per line")
+    sub.add_parser("stats", help="Show cache size")
+    args = parser.parse_args(argv)
+
+    if args.command == "warm":
+        topics = list(args.topics)
+        if args.file:
+            with open(args.file, encoding="utf-8") as f:
+                topics += [line.strip() for line in f if line.strip()]
+        cached, failed = warm(topics)
+        print(f"Cached {len(cached)} topics, {len(failed)} failed.")
+    print(get_cache().stats())
+
+
+if __name__ == "__main__":
+    main()